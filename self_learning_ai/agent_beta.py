@@ -1,6 +1,6 @@
 from search_module import search_web
 from shared_memory import save_memory
-from nn_brain import train_brain
+from training_scheduler import scheduler
 from question_generator import generate_questions_from_text
 from logger import log_event
 
@@ -9,7 +9,7 @@ def beta_listen_and_reply(question):
     answer = search_web(question)
     log_event("Beta", "Answer", answer)
     save_memory(question, answer)
-    train_brain()
+    scheduler.record_fact()
 
     follow_ups = generate_questions_from_text(answer)
     for q in follow_ups:
@@ -13,6 +13,8 @@ def main():
     print("💡 Available Commands:")
     print("   'get info' - Start automatic AI learning")
     print("   'get info 50' - Start with 50 learning cycles")
+    print("   'consolidate' - Merge near-duplicate questions in memory")
+    print("   'archive' - Compress answers nobody has read lately")
     print("   'quit' - Exit")
     print("=" * 40)
     
@@ -37,6 +39,14 @@ def main():
                     print("❌ Invalid number. Using default 25 cycles.")
                     get_info(25)
                     
+            elif command == "consolidate":
+                from nn_brain import consolidate_memory
+                consolidate_memory()
+
+            elif command == "archive":
+                from shared_memory import archive_answers
+                archive_answers()
+
             elif command in ["quit", "exit", "stop"]:
                 print("👋 Goodbye!")
                 break
@@ -1,10 +1,21 @@
 from agent_beta import beta_listen_and_reply
-from nn_brain import predict_answer
+from nn_brain import predict_answer_result, model_version
+from answer_cache import answer_cache
+from cold_answers import answer_key, record_access
 from logger import log_event
 
 def communicate(question):
+    answer = answer_cache.get(question, model_version())
+    if answer is not None:
+        # Counts like any other read, so the archive keeps served answers hot
+        record_access(answer_key(answer), read=True)
+        log_event("Brain", "Cached", answer)
+        return answer, []
     try:
-        answer = predict_answer(question)
+        result = predict_answer_result(question)
+        answer = result["answer"]
+        # Read after predicting: the prediction reloads a brain retrained elsewhere
+        answer_cache.put(question, answer, model_version(), result["match"])
         log_event("Brain", "Predicted", answer)
         return answer, []
     except:
@@ -0,0 +1,105 @@
+"""
+Answer cache in front of the brain
+Bounded LRU with a time-to-live, keyed on a normalised question. Entries
+remember the brain model version that produced them and the stored topic
+they were matched to, so a retrained model or a re-saved topic drops them.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from shared_memory import add_save_hook, add_bulk_save_hook
+
+
+def normalise_question(question):
+    """Case- and whitespace-insensitive cache key, ignoring trailing punctuation"""
+    return re.sub(r"\s+", " ", question).strip().rstrip("?!. ").lower()
+
+
+class AnswerCache:
+    def __init__(self, max_size=1024, ttl=600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (answer, model_version, topic, expires)
+        self.by_topic = {}            # stored topic -> cache keys answered from it
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, question, model_version):
+        """Cached answer for the question under this model version, or None"""
+        key = normalise_question(question)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                answer, version, _, expires = entry
+                if version == model_version and time.monotonic() < expires:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return answer
+                self._drop(key)
+            self.misses += 1
+            return None
+
+    def put(self, question, answer, model_version, topic=None):
+        """Remember an answer; topic is the stored question it was matched to"""
+        key = normalise_question(question)
+        with self.lock:
+            self._drop(key)
+            self.entries[key] = (answer, model_version, topic, time.monotonic() + self.ttl)
+            for name in {key, topic}:
+                if name is not None:
+                    self.by_topic.setdefault(name, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self._drop(next(iter(self.entries)))
+
+    def invalidate_topic(self, question, answer=None):
+        """save_memory hook: forget answers for this question or matched to it"""
+        with self.lock:
+            keys = self.by_topic.pop(question, set()) | self.by_topic.pop(normalise_question(question), set())
+            for key in keys:
+                if key in self.entries:
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def invalidate_topics(self, questions, answers=None):
+        """save_memories hook: invalidate_topic for every question of a bulk write"""
+        for question in questions:
+            self.invalidate_topic(question)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.by_topic.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for name in {key, entry[2]}:
+            keys = self.by_topic.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_topic[name]
+
+
+# Shared cache used by ai_communicator
+answer_cache = AnswerCache()
+add_save_hook(answer_cache.invalidate_topic)
+add_bulk_save_hook(answer_cache.invalidate_topics)
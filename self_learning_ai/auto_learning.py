@@ -8,8 +8,10 @@ import random
 import time
 import threading
 from search_module import search_web
-from shared_memory import save_memory, load_memory
-from nn_brain import train_brain, get_brain_stats
+from shared_memory import save_memory, iter_topics, memory_stats
+from nn_brain import get_brain_stats, predict_answers, find_known, warm_up
+from brain_trainer import finish_training
+from training_scheduler import scheduler
 from question_generator import generate_questions_from_text
 from random_question_generator import get_random_question, get_random_questions
 from logger import log_event
@@ -61,6 +63,30 @@ class AutoLearningSystem:
             log_event("System", "Error", f"Failed to generate random question: {e}")
             return "What is artificial intelligence?"
     
+    def queue_follow_ups(self, agent, follow_ups):
+        """Add follow-up questions to the pool, skipping ones already stored
+
+        A follow-up counts as known only if it, an alias of it, or a question
+        similar to it above the similarity threshold is stored; a confident
+        brain-tier guess is not enough.
+        """
+        try:
+            scheduler.record_predictions(predict_answers(follow_ups))
+            known = {q for q, match in zip(follow_ups, find_known(follow_ups)) if match}
+        except Exception as e:
+            log_event("System", "Error", f"Batch brain check failed: {e}")
+            known = set()
+
+        queued = []
+        for follow_up in follow_ups:
+            if follow_up in known:
+                log_event(agent, "Already known", follow_up)
+                continue
+            self.question_pool.append(follow_up)
+            log_event(agent, "Generated follow-up", follow_up)
+            queued.append(follow_up)
+        return queued
+
     def alpha_ask_question(self):
         """Alpha agent asks a question"""
         try:
@@ -96,11 +122,9 @@ class AutoLearningSystem:
             
             # Generate follow-up questions
             follow_ups = generate_questions_from_text(answer, 2)
-            for follow_up in follow_ups:
-                self.question_pool.append(follow_up)
-                log_event("Beta", "Generated follow-up", follow_up)
+            queued = self.queue_follow_ups("Beta", follow_ups)
             
-            print(f"🔴 BETA GENERATED {len(follow_ups)} follow-up questions")
+            print(f"🔴 BETA GENERATED {len(follow_ups)} follow-up questions ({len(queued)} new)")
             
             return answer, follow_ups
             
@@ -143,11 +167,9 @@ class AutoLearningSystem:
             
             # Generate follow-up questions
             follow_ups = generate_questions_from_text(answer, 2)
-            for follow_up in follow_ups:
-                self.question_pool.append(follow_up)
-                log_event("Alpha", "Generated follow-up", follow_up)
+            queued = self.queue_follow_ups("Alpha", follow_ups)
             
-            print(f"🔵 ALPHA GENERATED {len(follow_ups)} follow-up questions")
+            print(f"🔵 ALPHA GENERATED {len(follow_ups)} follow-up questions ({len(queued)} new)")
             
             return answer, follow_ups
             
@@ -177,14 +199,16 @@ class AutoLearningSystem:
                 answer, follow_ups = self.alpha_answer_question(question)
                 self.current_turn = "Alpha"  # Switch turn
             
-            # Train the brain with new knowledge
-            print(f"🧠 TRAINING BRAIN...")
-            train_brain()
+            # Let the scheduler decide whether the new knowledge warrants training
+            reason = scheduler.record_fact()
+            if reason:
+                print(f"🧠 TRAINING BRAIN (background, trigger: {reason})...")
+            else:
+                print(f"🧠 Training deferred ({scheduler.pending} new facts waiting)")
             
             # Show current statistics
             stats = get_brain_stats()
-            memory = load_memory()
-            print(f"📊 STATS: {len(memory['topics'])} topics | Brain: {'Trained' if stats['is_trained'] else 'Learning'}")
+            print(f"📊 STATS: {memory_stats()['topics']} topics | Brain: {'Trained' if stats['is_trained'] else 'Learning'}")
             print(f"📋 QUEUE: {len(self.question_pool)} questions waiting")
             
             time.sleep(2)  # Pause between cycles
@@ -218,6 +242,9 @@ class AutoLearningSystem:
             print(f"   ... and {len(initial_questions) - 5} more questions")
         
         log_event("System", "Started", f"Auto-learning with {target_cycles} cycles")
+
+        print("🧠 Warming up the neural brain...")
+        warm_up()
         
         try:
             while self.running and self.learning_cycles < target_cycles:
@@ -244,17 +271,21 @@ class AutoLearningSystem:
         print("🎉 AUTOMATIC LEARNING COMPLETED")
         print("=" * 60)
         
-        memory = load_memory()
+        print("⏳ Finishing background training...")
+        scheduler.flush()
+        finish_training()
+
         stats = get_brain_stats()
         
         print(f"📊 Final Statistics:")
         print(f"   - Learning Cycles: {self.learning_cycles}")
-        print(f"   - Total Knowledge: {len(memory['topics'])} topics")
+        print(f"   - Total Knowledge: {memory_stats()['topics']} topics")
         print(f"   - Brain Status: {'✅ Trained' if stats['is_trained'] else '❌ Not Trained'}")
+        print(f"   - Training Runs: {scheduler.runs}")
         print(f"   - Questions in Queue: {len(self.question_pool)}")
         
         print(f"\n📚 Recent Knowledge Acquired:")
-        recent_topics = list(memory['topics'].items())[-5:]
+        recent_topics = iter_topics(limit=5, newest_first=True)
         for i, (q, a) in enumerate(recent_topics, 1):
             print(f"   {i}. Q: {q}")
             print(f"      A: {a[:100]}{'...' if len(a) > 100 else ''}")
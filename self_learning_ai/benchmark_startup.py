@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Startup-time report for the light commands
+Times each command in a fresh interpreter (so nothing is already imported)
+and checks that none of them pulled in torch or the sentence transformer
+"""
+
+import subprocess
+import sys
+
+TARGET_SECONDS = 1.0
+
+COMMANDS = {
+    "import main": "import main",
+    "stats": "from nn_brain import get_brain_stats; get_brain_stats()",
+    "memory": "from shared_memory import load_memory; load_memory()",
+    "startup info": "import main; main.SelfLearningAI().show_startup_info()",
+}
+
+PROBE = """
+import sys, time, io, contextlib
+started = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec({code!r})
+elapsed = time.perf_counter() - started
+heavy = [m for m in ("torch", "sentence_transformers", "sklearn") if m in sys.modules]
+print(f"{{elapsed:.3f}} {{','.join(heavy) or '-'}}")
+"""
+
+def time_command(code):
+    """Run one command in a new interpreter, returning (seconds, heavy modules loaded)"""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code)],
+        capture_output=True, text=True, check=True
+    ).stdout.strip().splitlines()[-1]
+    seconds, heavy = output.split()
+    return float(seconds), heavy
+
+def benchmark_startup():
+    print("⏱️ Startup Time Report")
+    print("=" * 60)
+    print(f"{'command':<16} | {'seconds':>8} | heavy modules loaded")
+    print("-" * 60)
+
+    all_fast = True
+    for name, code in COMMANDS.items():
+        try:
+            seconds, heavy = time_command(code)
+        except subprocess.CalledProcessError as e:
+            print(f"{name:<16} | {'failed':>8} | {e.stderr.strip().splitlines()[-1]}")
+            all_fast = False
+            continue
+        ok = seconds < TARGET_SECONDS and heavy == "-"
+        all_fast = all_fast and ok
+        print(f"{name:<16} | {seconds:>8.3f} | {heavy} {'✅' if ok else '❌'}")
+
+    print("=" * 60)
+    if all_fast:
+        print(f"✅ All light commands start in under {TARGET_SECONDS:.0f}s without loading the encoder.")
+    else:
+        print("⚠️ Some light commands are slow or load heavy modules.")
+
+if __name__ == "__main__":
+    benchmark_startup()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the per-cycle cost and accuracy of train_brain() as knowledge grows
+Saves one fact at a time into a scratch knowledge base and runs the real
+train_brain() after each, the way the training scheduler does, including
+the snapshot, training record and index writes. Questions get synthetic
+embeddings clustered by subject (seeded into the embedding store), so no
+encoder or web access is needed.
+
+For every new fact the brain tier is asked right after its update:
+"correct" means it returns the fact's own answer, "confidently wrong" means
+it returns another answer above confidence_threshold, which is the case that
+keeps the similarity tier from answering.
+
+    python benchmark_training.py [start_facts] [cycles]
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+
+DIM = 384        # paraphrase-MiniLM-L6-v2 embedding size
+SUBJECTS = 20    # clusters of related questions, like real topics
+
+
+def synthetic_vector(rng, centroids, i):
+    """A unit vector near one subject's centroid, as related questions are"""
+    vec = centroids[i % SUBJECTS] + 0.35 * rng.randn(DIM)
+    return (vec / np.linalg.norm(vec)).astype(np.float32)
+
+
+def benchmark_training(start=100, cycles=200, report_every=50):
+    print("⏱️ Brain Training Benchmark")
+    print("=" * 72)
+
+    directory = tempfile.mkdtemp(prefix="benchmark_training_")
+    here = os.getcwd()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        os.chdir(directory)
+        with open("shared_memory.json", "w") as f:
+            json.dump({"topics": {}}, f)
+
+        import nn_brain
+        from shared_memory import save_memory, save_memories, intern_answers
+
+        rng = np.random.RandomState(0)
+        centroids = rng.randn(SUBJECTS, DIM)
+        store = nn_brain.get_embedding_store()
+
+        def fact(i):
+            question, answer = f"Benchmark question {i}?", f"Benchmark answer {i}."
+            vec = synthetic_vector(rng, centroids, i)
+            with nn_brain.brain_lock:
+                store.add_many([question], vec.reshape(1, -1))
+            return question, answer, vec
+
+        seed = [fact(i) for i in range(start)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            save_memories([(q, a) for q, a, _ in seed])
+            nn_brain.train_brain(full=True)
+
+        print(f"{'facts':>8} | {'train_brain (ms)':>16} | {'full refit (ms)':>15} | "
+              f"{'correct':>8} | {'confidently wrong':>17}")
+        print("-" * 72)
+
+        window, correct, wrong = [], 0, 0
+        X = [vec for _, _, vec in seed]
+        y = [answer for _, answer, _ in seed]
+        for cycle in range(1, cycles + 1):
+            question, answer, vec = fact(start + cycle)
+            X.append(vec)
+            y.append(answer)
+            with contextlib.redirect_stdout(io.StringIO()):
+                save_memory(question, answer)
+                started = time.perf_counter()
+                nn_brain.train_brain()
+            window.append(time.perf_counter() - started)
+
+            # Ask the brain tier the question it has just learned
+            proba = nn_brain.clf.predict_proba(vec.reshape(1, -1))[0]
+            label = nn_brain.clf.classes_[proba.argmax()]
+            if label == intern_answers([answer])[0]:
+                correct += 1
+            elif proba.max() >= nn_brain.confidence_threshold:
+                wrong += 1
+
+            if cycle % report_every == 0:
+                full = nn_brain.new_classifier()
+                started = time.perf_counter()
+                full.fit(np.array(X), intern_answers(y))
+                full_ms = (time.perf_counter() - started) * 1000
+
+                print(f"{len(y):>8} | {np.mean(window) * 1000:>16.1f} | {full_ms:>15.1f} | "
+                      f"{correct:>4}/{len(window):<3} | {wrong:>17}")
+                window, correct, wrong = [], 0, 0
+    finally:
+        os.chdir(here)
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("=" * 72)
+    print("✅ train_brain() times include saving the snapshot and training record every cycle.")
+
+
+if __name__ == "__main__":
+    benchmark_training(*[int(arg) for arg in sys.argv[1:3]])
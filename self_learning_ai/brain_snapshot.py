@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Pickle-free snapshot format for the neural brain
+A snapshot is a directory holding a small JSON manifest plus one .npy file per
+weight matrix, bias vector and the class labels. Arrays are opened with
+np.load(mmap_mode='r'), so several inference processes share the same pages,
+and loading never executes code from disk the way unpickling does.
+
+Each save writes a new generation of array files and then atomically replaces
+the manifest, so readers always see a complete model. Saves and loads hold a
+lock file in the snapshot directory, so processes that train in the
+background (main.py and auto_learning.py) never interleave their writes or
+delete arrays another process is about to map.
+
+Convert an existing pickled model with:
+    python brain_snapshot.py brain_model.pkl brain_snapshot
+"""
+
+import glob
+import json
+import os
+import sys
+import numpy as np
+from file_lock import FileLock
+
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# Training counters kept so partial_fit can continue where it left off
+LOSS_CURVE_TAIL = 10
+
+
+locks = {}  # snapshot directory -> FileLock
+
+
+def snapshot_lock(directory):
+    """The lock guarding one snapshot directory (shared by every caller in this process)"""
+    directory = os.path.abspath(directory)
+    if directory not in locks:
+        os.makedirs(directory, exist_ok=True)
+        locks.setdefault(directory, FileLock(os.path.join(directory, MANIFEST + ".lock")))
+    return locks[directory]
+
+
+def snapshot_exists(directory):
+    return os.path.exists(os.path.join(directory, MANIFEST))
+
+
+def read_manifest(directory):
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def save_snapshot(net, directory):
+    """Write a trained MLPClassifier as a new snapshot generation"""
+    with snapshot_lock(directory):
+        return _save_snapshot(net, directory)
+
+
+def _save_snapshot(net, directory):
+    try:
+        generation = read_manifest(directory)["generation"] + 1
+    except (OSError, ValueError, KeyError):
+        generation = 1
+    # The random part keeps file names unique even if a manifest was lost
+    token = f"{generation}-{os.urandom(4).hex()}"
+
+    def write_array(name, array):
+        filename = f"{name}.g{token}.npy"
+        np.save(os.path.join(directory, filename), np.ascontiguousarray(array))
+        return filename
+
+    params = net.get_params()
+    params["hidden_layer_sizes"] = list(np.atleast_1d(params["hidden_layer_sizes"]).tolist())
+    best_loss = getattr(net, "best_loss_", None)
+
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "generation": generation,
+        "params": params,
+        "classes": write_array("classes", net.classes_),
+        "coefs": [write_array(f"coef_{i}", c) for i, c in enumerate(net.coefs_)],
+        "intercepts": [write_array(f"intercept_{i}", b) for i, b in enumerate(net.intercepts_)],
+        "out_activation": net.out_activation_,
+        "n_features_in": int(net.n_features_in_),
+        "n_outputs": int(net.n_outputs_),
+        "n_iter": int(getattr(net, "n_iter_", 0)),
+        "t": int(getattr(net, "t_", 0)),
+        "best_loss": None if best_loss is None else float(best_loss),
+        "no_improvement_count": int(getattr(net, "_no_improvement_count", 0)),
+        "loss_curve_tail": [float(v) for v in getattr(net, "loss_curve_", [])[-LOSS_CURVE_TAIL:]]
+    }
+
+    tmp_path = os.path.join(directory, f"{MANIFEST}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+    remove_old_generations(directory, manifest)
+    return manifest
+
+
+def remove_old_generations(directory, manifest):
+    """Delete array files the manifest no longer uses (lock held; mapped files stay readable)"""
+    keep = {manifest["classes"], *manifest["coefs"], *manifest["intercepts"]}
+    for path in glob.glob(os.path.join(directory, "*.g*.npy")):
+        if os.path.basename(path) not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_snapshot(directory, mmap=True):
+    """Rebuild an MLPClassifier from a snapshot, memory-mapping its arrays"""
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.preprocessing import LabelBinarizer
+
+    mode = "r" if mmap else None
+
+    def load_array(filename):
+        return np.load(os.path.join(directory, filename), mmap_mode=mode)
+
+    # Map every array before a concurrent save can delete the files
+    with snapshot_lock(directory):
+        manifest = read_manifest(directory)
+        if manifest.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"unsupported snapshot version {manifest.get('version')}")
+        coefs = [load_array(name) for name in manifest["coefs"]]
+        intercepts = [load_array(name) for name in manifest["intercepts"]]
+        classes = np.array(load_array(manifest["classes"]))
+
+    params = dict(manifest["params"])
+    params["hidden_layer_sizes"] = tuple(params["hidden_layer_sizes"])
+    net = MLPClassifier(**params)
+
+    net.coefs_ = coefs
+    net.intercepts_ = intercepts
+    net.n_layers_ = len(net.coefs_) + 1
+    net.out_activation_ = manifest["out_activation"]
+    net.n_features_in_ = manifest["n_features_in"]
+    net.n_outputs_ = manifest["n_outputs"]
+
+    net._label_binarizer = LabelBinarizer().fit(classes)
+    net.classes_ = net._label_binarizer.classes_
+
+    net.n_iter_ = manifest["n_iter"]
+    net.t_ = manifest["t"]
+    net.best_loss_ = manifest["best_loss"]
+    net._no_improvement_count = manifest["no_improvement_count"]
+    net.loss_curve_ = list(manifest["loss_curve_tail"])
+    if net.loss_curve_:
+        net.loss_ = net.loss_curve_[-1]
+    return net
+
+
+def make_writable(net):
+    """Copy memory-mapped weights into RAM so the model can be trained further"""
+    net.coefs_ = [np.array(c) for c in net.coefs_]
+    net.intercepts_ = [np.array(b) for b in net.intercepts_]
+    return net
+
+
+def intern_classes(net):
+    """Relabel a model trained on answer strings with answer-table IDs
+
+    Classes are kept sorted, so the output layer is reordered to match (a
+    two-class model has one output unit, which is flipped instead).
+    """
+    from shared_memory import intern_answers
+    ids = np.array(intern_answers([str(label) for label in net.classes_]), dtype=np.int64)
+    order = np.argsort(ids, kind="stable")
+    if len(ids) == 2:
+        if order[0] == 1:
+            net.coefs_[-1] = -np.asarray(net.coefs_[-1])
+            net.intercepts_[-1] = -np.asarray(net.intercepts_[-1])
+    else:
+        net.coefs_[-1] = np.asarray(net.coefs_[-1])[:, order]
+        net.intercepts_[-1] = np.asarray(net.intercepts_[-1])[order]
+    net.classes_ = ids[order]
+    return net
+
+
+def convert_pickle(pickle_path="brain_model.pkl", directory="brain_snapshot"):
+    """One-off migration of a pickled brain model (only run this on files you trust)"""
+    import pickle
+    with open(pickle_path, "rb") as f:
+        net = pickle.load(f)
+    if np.asarray(net.classes_).dtype.kind not in "iu":
+        # Older brains predicted the answer text itself
+        intern_classes(net)
+    manifest = save_snapshot(net, directory)
+    print(f"✅ Converted {pickle_path} to {directory}/ ({len(manifest['coefs'])} layers, {len(net.classes_)} classes)")
+    return manifest
+
+
+if __name__ == "__main__":
+    convert_pickle(*sys.argv[1:3])
@@ -0,0 +1,94 @@
+"""
+Background training worker for the neural brain
+Consumes "new knowledge" events on a daemon thread and runs train_brain()
+there, so answering a question never waits for a model fit. train_brain()
+builds each new model off to the side and swaps it in atomically, so readers
+always see a complete, consistent model. A burst of events that arrives while
+a run is in progress is merged into a single follow-up run.
+"""
+
+import queue
+import threading
+from nn_brain import train_brain
+
+STOP = object()
+
+
+class BrainTrainer:
+    def __init__(self):
+        self.events = queue.Queue()
+        self.thread = None
+        self.pending = 0
+        self.done = threading.Condition()
+        self.runs = 0
+        self.failures = 0
+
+    def start(self):
+        """Start the worker thread if it is not running yet"""
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, name="brain-trainer", daemon=True)
+            self.thread.start()
+
+    def notify(self, question=None, answer=None, full=False):
+        """Report new knowledge; training happens in the background"""
+        with self.done:
+            self.pending += 1
+        self.events.put(full)
+        self.start()
+
+    def _drain(self, full):
+        """Merge every queued event into one run; a single full request makes it a rebuild
+
+        Returns (full, number of events merged, whether a stop was requested).
+        """
+        merged = 1
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return full, merged, False
+            if event is STOP:
+                return full, merged, True
+            full = full or event
+            merged += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            event = self.events.get()
+            if event is STOP:
+                break
+            full, merged, stopping = self._drain(event)
+            try:
+                if not train_brain(full=full):
+                    self.failures += 1
+                self.runs += 1
+            except Exception as e:
+                self.failures += 1
+                print(f"❌ Background training failed: {e}")
+            with self.done:
+                self.pending -= merged
+                self.done.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until all reported knowledge has been trained; returns False on timeout"""
+        with self.done:
+            return self.done.wait_for(lambda: self.pending <= 0, timeout)
+
+    def stop(self, timeout=None):
+        """Finish pending training and stop the worker"""
+        if self.thread is not None and self.thread.is_alive():
+            self.events.put(STOP)
+            self.thread.join(timeout)
+
+
+# Shared worker used by the agents
+trainer = BrainTrainer()
+
+def request_training(full=False):
+    """Queue a background training run"""
+    trainer.notify(full=full)
+
+def finish_training(timeout=None):
+    """Wait for queued background training to complete"""
+    return trainer.wait(timeout)
@@ -0,0 +1,294 @@
+"""
+Hot/cold tiers for stored answers
+Recently or frequently read answers are kept as plain text in the knowledge
+base. Long answers nobody has read for a while are moved to a cold file,
+compressed with zlib against a dictionary shared by every answer, and the
+knowledge base keeps only a short reference to them:
+
+    "cold:<digest>:<offset>:<length>"
+
+References are decompressed on demand. Reads and saves are tracked so the
+next archive pass knows which answers are hot.
+
+The cold file is a sequence of records (4-byte length, 8-byte digest, blob)
+and is only ever appended to. Freezing also appends each answer's keyword
+term counts to a terms file, so the BM25 index keeps covering cold answers
+without decompressing them.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from file_lock import FileLock
+
+COLD_PREFIX = "cold:"
+
+# What the search module stores when a web search found nothing
+NO_RESULT = "No result found."
+
+cold_file = "shared_memory_cold.bin"
+dict_file = "shared_memory_cold.zdict"
+terms_file = "shared_memory_cold_terms.jsonl"
+access_file = "shared_memory_access.json"
+cold_lock = FileLock(cold_file + ".lock")
+
+# Archive policy: answers at least this long that were neither saved nor read
+# within idle_seconds, nor read hot_reads times since the last pass, go cold
+min_cold_length = 400
+idle_seconds = 7 * 24 * 3600
+hot_reads = 3
+# Long-running processes share their access stats at least this often
+flush_every = 60
+ZDICT_SIZE = 32 * 1024
+
+zdict = None
+cold_index = None   # digest -> reference, for answers already in the cold file
+cold_end = 0
+cold_terms_index = {}  # digest -> {term: count}, for answers frozen with their terms
+terms_end = 0
+access = {}         # digest -> [reads since last pass, last read or save time]
+access_lock = threading.Lock()
+last_flush = time.time()
+
+HEADER = struct.Struct(">I8s")
+
+
+def answer_digest(answer):
+    """Short fingerprint of an answer text"""
+    return hashlib.blake2b(answer.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def is_cold(value):
+    return isinstance(value, str) and value.startswith(COLD_PREFIX)
+
+
+def is_answer(value):
+    """Whether a stored value is a real answer (not empty, not a failed search)"""
+    return bool(value) and value != NO_RESULT
+
+
+def is_knowledge(question, answer):
+    """Whether a stored (question, answer) pair is knowledge the brain learns"""
+    return bool(question) and is_answer(answer)
+
+
+def knowledge_key(question, answer):
+    """Digest an answer adds to the unique-answer count (None if it is not knowledge)"""
+    return answer_key(answer) if is_knowledge(question, answer) else None
+
+
+def answer_key(value):
+    """Digest of the answer a stored value stands for, without decompressing it"""
+    if is_cold(value):
+        return value[len(COLD_PREFIX):].split(":", 1)[0]
+    return answer_digest(value)
+
+
+def load_zdict():
+    global zdict
+    if zdict is None and os.path.exists(dict_file):
+        with open(dict_file, "rb") as f:
+            zdict = f.read()
+    return zdict
+
+
+def hydrate(value):
+    """The answer text behind a stored value (plain text comes back unchanged)"""
+    if not is_cold(value):
+        return value
+    _, offset, length = value[len(COLD_PREFIX):].split(":")
+    with open(cold_file, "rb") as f:
+        f.seek(int(offset))
+        blob = f.read(int(length))
+    decompressor = zlib.decompressobj(zdict=load_zdict())
+    return (decompressor.decompress(blob) + decompressor.flush()).decode("utf-8")
+
+
+def answer_of(value):
+    """hydrate() for a read that should count towards keeping the answer hot"""
+    record_access(answer_key(value), read=True)
+    return hydrate(value)
+
+
+def record_access(key, read=False):
+    with access_lock:
+        stats = access.setdefault(key, [0, 0.0])
+        if read:
+            stats[0] += 1
+        stats[1] = time.time()
+        due = stats[1] - last_flush >= flush_every
+    if due:
+        # So an archive pass in another process sees what this one serves
+        flush_access()
+
+
+def load_access():
+    """Access stats from disk merged with the ones gathered in this process"""
+    try:
+        with open(access_file) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        saved = {}
+    with access_lock:
+        for key, (reads, last) in access.items():
+            old = saved.get(key, [0, 0.0])
+            saved[key] = [old[0] + reads, max(old[1], last)]
+    return saved
+
+
+def seed_access(values, now=None):
+    """Mark answers as saved now, e.g. when an existing store is migrated
+
+    Answers without any access record would otherwise look idle since 1970
+    to the next archive pass and all go cold at once.
+    """
+    now = now or time.time()
+    with access_lock:
+        for value in values:
+            if is_answer(value):
+                stats = access.setdefault(answer_key(value), [0, 0.0])
+                stats[1] = max(stats[1], now)
+    flush_access()
+
+
+def flush_access(reset_reads=False):
+    """Persist access stats (optionally starting a new read-count period)"""
+    global last_flush
+    last_flush = time.time()
+    with cold_lock:
+        merged = load_access()
+        if reset_reads:
+            merged = {key: [0, last] for key, (_, last) in merged.items()}
+        tmp_path = f"{access_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(merged, f)
+        os.replace(tmp_path, access_file)
+        with access_lock:
+            access.clear()
+    return merged
+
+
+atexit.register(lambda: access and flush_access())
+
+
+def build_zdict(samples):
+    """Shared compression dictionary from sample answers (created once, then fixed)"""
+    global zdict
+    if load_zdict() is None:
+        data = "\n".join(samples).encode("utf-8")[-ZDICT_SIZE:]
+        with open(dict_file, "wb") as f:
+            f.write(data)
+        zdict = data
+    return zdict
+
+
+def load_cold_index():
+    """Index the cold records we have not seen yet"""
+    global cold_index, cold_end
+    if cold_index is None:
+        cold_index, cold_end = {}, 0
+    if not os.path.exists(cold_file):
+        return
+    with open(cold_file, "rb") as f:
+        f.seek(cold_end)
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            length, digest = HEADER.unpack(header)
+            offset = cold_end + HEADER.size
+            if offset + length > os.fstat(f.fileno()).st_size:
+                break
+            cold_index[digest.hex()] = f"{COLD_PREFIX}{digest.hex()}:{offset}:{length}"
+            f.seek(length, os.SEEK_CUR)
+            cold_end = offset + length
+
+
+def load_cold_terms():
+    """Read the term records appended since the last look"""
+    global terms_end
+    if not os.path.exists(terms_file):
+        return
+    with open(terms_file, "rb") as f:
+        f.seek(terms_end)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # half-written record, picked up once it is complete
+            record = json.loads(line)
+            cold_terms_index[record["key"]] = record["terms"]
+            terms_end += len(line)
+
+
+def cold_terms(key):
+    """Keyword term counts recorded when an answer was frozen, or None"""
+    if key not in cold_terms_index:
+        load_cold_terms()
+    return cold_terms_index.get(key)
+
+
+def freeze(answers):
+    """Cold references for answer texts, compressing the ones not stored yet"""
+    from lexical_index import term_counts
+    with cold_lock:
+        load_cold_index()
+        build_zdict(answers[:200])
+        terms = []
+        written = set()
+        with open(cold_file, "ab") as f:
+            for answer in answers:
+                key = answer_digest(answer)
+                if key in cold_index or key in written:
+                    continue
+                written.add(key)
+                compressor = zlib.compressobj(9, zdict=zdict)
+                blob = compressor.compress(answer.encode("utf-8")) + compressor.flush()
+                f.write(HEADER.pack(len(blob), bytes.fromhex(key)) + blob)
+                terms.append(json.dumps({"key": key, "terms": term_counts(answer)}) + "\n")
+        if terms:
+            with open(terms_file, "a") as f:
+                f.write("".join(terms))
+        load_cold_index()
+        return [cold_index[answer_digest(answer)] for answer in answers]
+
+
+def retier(topics, now=None):
+    """Move idle long answers of a topic -> value mapping to the cold tier and hot ones back
+
+    Changes topics in place; returns (answers frozen, answers thawed).
+    """
+    now = now or time.time()
+    stats = load_access()
+    # Answers never seen before (e.g. from before access tracking) start their idle time now
+    unseen = [
+        value for value in topics.values()
+        if is_answer(value) and answer_key(value) not in stats
+    ]
+    if unseen:
+        seed_access(unseen, now)
+        stats = load_access()
+
+    def hot(key):
+        reads, last = stats.get(key, (0, 0.0))
+        return reads >= hot_reads or now - last < idle_seconds
+
+    to_freeze, thawed = [], 0
+    for topic, value in topics.items():
+        if not is_knowledge(topic, value):
+            continue
+        if is_cold(value):
+            if hot(answer_key(value)):
+                topics[topic] = hydrate(value)
+                thawed += 1
+        elif len(value) >= min_cold_length and not hot(answer_digest(value)):
+            to_freeze.append(topic)
+
+    if to_freeze:
+        refs = freeze([topics[topic] for topic in to_freeze])
+        for topic, ref in zip(to_freeze, refs):
+            topics[topic] = ref
+    return len(to_freeze), thawed
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Shared embedding service on a Unix domain socket
+One process holds the sentence transformer; every other process sends it
+texts and gets unit-length float32 vectors back, so workers no longer load
+torch and the model themselves. Requests arriving within `max_wait` seconds
+of each other are encoded together as one batch.
+
+Start the server:
+    python embedding_server.py [socket_path]
+
+Then point the brain at it before starting the workers:
+    export EMBEDDING_SOCKET=/tmp/alpha_embeddings.sock
+
+Wire format (both directions): 4-byte big-endian length + JSON header,
+followed by the raw float32 matrix in replies.
+"""
+
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import numpy as np
+
+default_socket = "/tmp/alpha_embeddings.sock"
+
+
+def send_message(sock, header, payload=b""):
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(struct.pack(">I", len(data)) + data + payload)
+
+
+def recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("embedding socket closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    (size,) = struct.unpack(">I", recv_exact(sock, 4))
+    return json.loads(recv_exact(sock, size))
+
+
+class Batcher:
+    """Merges concurrent encode requests into shared encoder batches"""
+
+    def __init__(self, encoder, max_batch=256, max_wait=0.005):
+        self.encoder = encoder
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.texts = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def encode(self, texts):
+        """Queue texts and block until their vectors are ready"""
+        done = threading.Event()
+        request = {"texts": texts, "done": done, "vecs": None, "error": None}
+        self.requests.put(request)
+        done.wait()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["vecs"]
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            size = len(batch[0]["texts"])
+            while size < self.max_batch:
+                try:
+                    request = self.requests.get(timeout=self.max_wait)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                size += len(request["texts"])
+
+            texts = [text for request in batch for text in request["texts"]]
+            try:
+                vecs = self.encoder(texts)
+                error = None
+            except Exception as e:
+                error = e
+            self.batches += 1
+            self.texts += len(texts)
+
+            start = 0
+            for request in batch:
+                end = start + len(request["texts"])
+                if error is None:
+                    request["vecs"] = vecs[start:end]
+                else:
+                    request["error"] = error
+                request["done"].set()
+                start = end
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, model_name, batcher, dimension):
+        self.model_name = model_name
+        self.batcher = batcher
+        self.dimension = dimension
+        super().__init__(socket_path, EmbeddingHandler)
+
+
+class EmbeddingHandler(socketserver.BaseRequestHandler):
+    """Serves encode requests on one client connection until it closes"""
+
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request = recv_message(self.request)
+            except (ConnectionError, struct.error, ValueError):
+                return
+            if request.get("model") != server.model_name:
+                send_message(self.request, {"error": f"server encodes with {server.model_name}"})
+                continue
+            texts = request.get("texts", [])
+            try:
+                vecs = server.batcher.encode(texts) if texts else np.zeros((0, server.dimension), dtype=np.float32)
+            except Exception as e:
+                send_message(self.request, {"error": str(e)})
+                continue
+            vecs = np.ascontiguousarray(vecs, dtype=np.float32)
+            send_message(self.request, {"shape": list(vecs.shape)}, vecs.tobytes())
+
+
+class EmbeddingClient:
+    """Connection to an embedding server; safe to share between threads"""
+
+    def __init__(self, socket_path=default_socket, model_name="paraphrase-MiniLM-L6-v2"):
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def encode(self, texts):
+        """Unit-length float32 embeddings for texts, one row each"""
+        with self.lock:
+            try:
+                return self._request(list(texts))
+            except (ConnectionError, OSError):
+                # The server may have restarted; reconnect once
+                self.close()
+                return self._request(list(texts))
+
+    def _request(self, texts):
+        if self.sock is None:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.socket_path)
+        send_message(self.sock, {"model": self.model_name, "texts": texts})
+        reply = recv_message(self.sock)
+        if "error" in reply:
+            raise RuntimeError(f"embedding server: {reply['error']}")
+        rows, dim = reply["shape"]
+        data = recv_exact(self.sock, rows * dim * 4)
+        return np.frombuffer(data, dtype=np.float32).reshape(rows, dim).copy()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+clients = {}
+
+
+def encode(texts, socket_path=default_socket, model_name="paraphrase-MiniLM-L6-v2"):
+    """Encode texts through the embedding server (one cached connection per socket)"""
+    client = clients.get(socket_path)
+    if client is None:
+        client = clients[socket_path] = EmbeddingClient(socket_path, model_name)
+    return client.encode(texts)
+
+
+def serve(socket_path=default_socket, model_name="paraphrase-MiniLM-L6-v2", batch_size=256):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+
+    def encoder(texts):
+        return model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    batcher = Batcher(encoder, max_batch=batch_size)
+    server = EmbeddingServer(socket_path, model_name, batcher, model.get_sentence_embedding_dimension())
+    print(f"🧠 Embedding server ready on {socket_path} ({model_name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(socket_path)
+        print(f"👋 Embedding server stopped after {batcher.batches} batches ({batcher.texts} texts).")
+
+
+if __name__ == "__main__":
+    serve(*sys.argv[1:2])
@@ -0,0 +1,170 @@
+"""
+Persistent embedding store for the neural brain
+Keeps question embeddings in a memory-mapped float32 .npy matrix so they
+survive restarts, plus a small JSON key index mapping a hash of
+(model name, question text) to a row of that matrix.
+
+Several processes may share one store. Rows are handed out under a file
+lock after catching up with the rows other processes added: new keys are
+appended to a key log right away, and flush() folds the log into the JSON
+index and starts a new log. The log's first line names its generation, so
+a process notices when another one has started a new log.
+"""
+
+import hashlib
+import json
+import os
+import numpy as np
+from file_lock import FileLock
+from mmap_matrix import MappedMatrix, new_generation, start_log, read_log
+
+STORE_VERSION = 2
+
+
+def new_log(path):
+    """Atomically start an empty key log with a fresh generation; returns (generation, end)"""
+    generation = new_generation()
+    return generation, start_log(path, f"#{generation}\n".encode())
+
+
+class EmbeddingStore:
+    def __init__(self, path="embeddings.npy", model_name=""):
+        base = os.path.splitext(path)[0]
+        self.path = path
+        self.index_path = base + "_index.json"
+        self.log_path = base + "_index.log"
+        self.lock = FileLock(path + ".lock")
+        self.model_name = model_name
+        self.keys = {}
+        self.count = 0
+        self.matrix = MappedMatrix(path)
+        self.generation = None
+        self.log_end = 0
+        self.dirty = False
+        with self.lock:
+            self._load()
+
+    def _load(self):
+        """Catch up with the store on disk (call with the lock held)
+
+        Ignores a store built for another model.
+        """
+        try:
+            if not os.path.exists(self.log_path):
+                new_log(self.log_path)
+            with open(self.log_path, "rb") as f:
+                header = f.readline()
+                generation = header[1:].strip().decode()
+                if generation != self.generation:
+                    # First look, or another process flushed: start from the JSON index
+                    self.keys, self.count = {}, 0
+                    self.generation, self.log_end = generation, len(header)
+                    if os.path.exists(self.index_path):
+                        with open(self.index_path) as index_file:
+                            index = json.load(index_file)
+                        if index.get("version") != STORE_VERSION or index.get("model") != self.model_name:
+                            print("⚠️ Embedding store belongs to another model, starting fresh.")
+                            self.matrix.forget()
+                            self.log_end = os.fstat(f.fileno()).st_size
+                            return
+                        self.keys = index["keys"]
+                        self.count = index["count"]
+
+                lines, self.log_end = read_log(f, self.log_end)
+                for line in lines:
+                    key, row = line.split()
+                    self.keys[key.decode()] = int(row)
+                    self.count = max(self.count, int(row) + 1)
+
+            # Grown (replaced) by another process: map the new file
+            self.matrix.refresh()
+        except Exception as e:
+            print(f"⚠️ Failed to open embedding store: {e}")
+            self.matrix.forget()
+            self.keys = {}
+            self.count = 0
+
+    def key_for(self, text):
+        """Stable key for a text under the current model"""
+        digest = hashlib.blake2b(f"{self.model_name}\0{text}".encode("utf-8"), digest_size=8)
+        return digest.hexdigest()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, text):
+        return self.key_for(text) in self.keys
+
+    def get(self, text):
+        """Return the stored vector for a text, or None if it was never encoded"""
+        row = self.keys.get(self.key_for(text))
+        if row is None:
+            return None
+        return np.array(self.matrix.data[row])
+
+    def get_many(self, texts):
+        """Look up a batch of texts at once
+
+        Returns a float32 matrix with one row per text (zeros where nothing is
+        stored) and the positions of the texts that still need encoding.
+        """
+        with self.lock:
+            self._load()
+        rows = [self.keys.get(self.key_for(text), -1) for text in texts]
+        missing = [i for i, row in enumerate(rows) if row < 0]
+        matrix = self.matrix.data
+        if matrix is None or not self.count:
+            return None, missing
+        found = np.array([row for row in rows if row >= 0], dtype=np.int64)
+        vecs = np.zeros((len(texts), matrix.shape[1]), dtype=np.float32)
+        if len(found):
+            vecs[[i for i, row in enumerate(rows) if row >= 0]] = matrix[found]
+        return vecs, missing
+
+    def add(self, text, vec):
+        """Store one vector (call flush() to persist the key index)"""
+        self.add_many([text], np.asarray(vec, dtype=np.float32).reshape(1, -1))
+
+    def add_many(self, texts, vecs):
+        """Store a batch of vectors, growing the backing file as needed"""
+        vecs = np.asarray(vecs, dtype=np.float32)
+        if len(texts) == 0:
+            return
+        with self.lock:
+            self._load()
+            used = self.count
+            rows = []
+            new = []
+            for text in texts:
+                key = self.key_for(text)
+                if key not in self.keys:
+                    self.keys[key] = self.count
+                    new.append(f"{key} {self.count}\n")
+                    self.count += 1
+                rows.append(self.keys[key])
+
+            self.matrix.ensure_capacity(self.count, vecs.shape[1], used)
+            end = self.matrix.write(rows, vecs, self.log_path, new)
+            if end is not None:
+                self.log_end = end
+            self.dirty = True
+
+    def flush(self):
+        """Persist vectors and fold the key log into the JSON index if anything changed"""
+        if not self.dirty:
+            return
+        with self.lock:
+            self._load()
+            self.matrix.flush()
+            tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({
+                    "version": STORE_VERSION,
+                    "model": self.model_name,
+                    "count": self.count,
+                    "keys": self.keys
+                }, f)
+            os.replace(tmp_path, self.index_path)
+            # A crash before the new log only replays keys the index holds
+            self.generation, self.log_end = new_log(self.log_path)
+            self.dirty = False
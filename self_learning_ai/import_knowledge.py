@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Bulk import of curated question/answer pairs
+Streams the pairs into shared memory in one transaction, encodes the new
+questions in batches, updates the vector index once and retrains the brain
+once at the end.
+
+    python import_knowledge.py pairs.jsonl
+
+Accepted input: JSON lines of {"question": ..., "answer": ...} or
+[question, answer], or a JSON file holding a question -> answer object,
+a list of pairs, or a shared_memory.json-style {"topics": {...}}.
+"""
+
+import json
+import sys
+import time
+from shared_memory import save_memories
+from nn_brain import train_brain
+
+
+def read_pairs(path):
+    """Yield (question, answer) pairs from a JSON or JSON-lines file"""
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    yield record["question"], record["answer"]
+                else:
+                    yield record[0], record[1]
+        return
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        yield from data.get("topics", data).items()
+    else:
+        for question, answer in data:
+            yield question, answer
+
+
+def import_knowledge(path):
+    print(f"📥 Importing knowledge from {path}...")
+    started = time.time()
+    questions = save_memories(read_pairs(path))
+    print(f"✅ Stored {len(questions)} topics in {time.time() - started:.1f}s.")
+
+    started = time.time()
+    train_brain(full=True)
+    print(f"✅ Brain retrained in {time.time() - started:.1f}s.")
+    return len(questions)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python import_knowledge.py <pairs.jsonl|pairs.json>")
+        sys.exit(1)
+    import_knowledge(sys.argv[1])
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Columnar export/import of the knowledge base and its embeddings
+A bundle is one uncompressed .npz file with flat arrays only:
+
+    question_offsets, question_blob   UTF-8 questions; question i (its ID) is
+                                      question_blob[offsets[i]:offsets[i + 1]]
+    answer_offsets, answer_blob       each distinct answer once, same encoding
+    answer_ids                        answer ID of every question
+    embeddings                        float32 or float16 row per question
+    meta                              JSON: format, encoder model, counts
+
+Because nothing is compressed, open_bundle() maps every array straight
+from the file without reading it. Importing a bundle fills the embedding
+store from it, so a fresh node gets its vector index and brain without
+running the encoder once.
+
+    python knowledge_bundle.py export knowledge.npz [--float16]
+    python knowledge_bundle.py import knowledge.npz [--no-train]
+
+Importing stores and indexes the topics in well under a second per thousand;
+fitting the classifier afterwards is the slow part and can be left to the
+next training run with --no-train.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+import zipfile
+import numpy as np
+
+BUNDLE_FORMAT = 1
+
+
+def pack_texts(texts):
+    """Offsets and one UTF-8 blob for a list of strings"""
+    encoded = [text.encode("utf-8") for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def export_bundle(path, float16=False):
+    """Write every stored topic, its answer and its question embedding to a bundle"""
+    from shared_memory import iter_topics
+    from cold_answers import answer_key
+    import nn_brain
+
+    print(f"📦 Exporting knowledge to {path}...")
+    started = time.time()
+    questions, answer_ids, answers, ids = [], [], [], {}
+    for question, answer in iter_topics():
+        answer = answer or ""
+        key = answer_key(answer)
+        if key not in ids:
+            ids[key] = len(answers)
+            answers.append(answer)
+        questions.append(question)
+        answer_ids.append(ids[key])
+
+    # Only questions missing from the embedding store are encoded
+    embeddings = nn_brain.embed_topics(questions)
+    embeddings = embeddings.astype(np.float16 if float16 else np.float32)
+
+    question_offsets, question_blob = pack_texts(questions)
+    answer_offsets, answer_blob = pack_texts(answers)
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "model": nn_brain.model_name,
+        "topics": len(questions),
+        "answers": len(answers),
+        "dim": int(embeddings.shape[1]),
+        "dtype": embeddings.dtype.name,
+        "exported": time.time()
+    }
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            meta=np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            question_offsets=question_offsets,
+            question_blob=question_blob,
+            answer_offsets=answer_offsets,
+            answer_blob=answer_blob,
+            answer_ids=np.array(answer_ids, dtype=np.int32),
+            embeddings=embeddings
+        )
+    os.replace(tmp_path, path)
+    print(f"✅ Exported {len(questions)} topics ({len(answers)} distinct answers, "
+          f"{os.path.getsize(path) / 1e6:.1f} MB) in {time.time() - started:.1f}s.")
+    return meta
+
+
+def map_member(path, info):
+    """Memory-map one stored .npy member of a zip file"""
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+    if 0 in shape:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran else "C")
+
+
+class Bundle:
+    """A bundle opened read-only; arrays are memory-mapped, texts decoded on access"""
+
+    def __init__(self, path):
+        self.path = path
+        self.arrays = {}
+        with zipfile.ZipFile(path) as z:
+            for info in z.infolist():
+                name = info.filename[:-len(".npy")]
+                if info.compress_type == zipfile.ZIP_STORED:
+                    self.arrays[name] = map_member(path, info)
+                else:
+                    # np.savez_compressed bundles still load, just not zero-copy
+                    with z.open(info) as member:
+                        self.arrays[name] = np.lib.format.read_array(member)
+        self.meta = json.loads(bytes(self.arrays["meta"]).decode("utf-8"))
+        if self.meta.get("format") != BUNDLE_FORMAT:
+            raise ValueError(f"unsupported bundle format {self.meta.get('format')}")
+        self.embeddings = self.arrays["embeddings"]
+        self.answer_ids = self.arrays["answer_ids"]
+
+    def __len__(self):
+        return len(self.answer_ids)
+
+    def text(self, name, i):
+        offsets = self.arrays[f"{name}_offsets"]
+        return bytes(self.arrays[f"{name}_blob"][offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def question(self, i):
+        return self.text("question", i)
+
+    def answer(self, answer_id):
+        return self.text("answer", answer_id)
+
+    def questions(self):
+        return [self.question(i) for i in range(len(self))]
+
+    def pairs(self):
+        """(question, answer) for every topic, decoding each distinct answer once"""
+        answers = [self.answer(i) for i in range(len(self.arrays["answer_offsets"]) - 1)]
+        return [(self.question(i), answers[answer_id]) for i, answer_id in enumerate(self.answer_ids)]
+
+
+def open_bundle(path):
+    return Bundle(path)
+
+
+def import_bundle(path, train=True):
+    """Load a bundle into shared memory, the embedding store and the vector index"""
+    import nn_brain
+    from shared_memory import save_memories
+
+    print(f"📥 Importing knowledge bundle {path}...")
+    started = time.time()
+    bundle = open_bundle(path)
+    pairs = bundle.pairs()
+
+    if bundle.meta["model"] == nn_brain.model_name:
+        # Seed the store first, so the save hooks find every embedding there
+        store = nn_brain.get_embedding_store()
+        with nn_brain.brain_lock:
+            store.add_many([question for question, _ in pairs], bundle.embeddings)
+            store.flush()
+    else:
+        print(f"⚠️ Bundle embeddings come from {bundle.meta['model']}, not {nn_brain.model_name}; "
+              "questions will be re-encoded.")
+
+    questions = save_memories(pairs)
+    print(f"✅ Stored and indexed {len(questions)} topics in {time.time() - started:.1f}s.")
+
+    if train:
+        started = time.time()
+        nn_brain.train_brain(full=True)
+        print(f"✅ Brain retrained in {time.time() - started:.1f}s.")
+    return len(questions)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("export", "import"):
+        print("Usage: python knowledge_bundle.py export <bundle.npz> [--float16]")
+        print("       python knowledge_bundle.py import <bundle.npz> [--no-train]")
+        sys.exit(1)
+    if sys.argv[1] == "export":
+        export_bundle(sys.argv[2], float16="--float16" in sys.argv[3:])
+    else:
+        import_bundle(sys.argv[2], train="--no-train" not in sys.argv[3:])
@@ -0,0 +1,168 @@
+"""
+BM25 keyword index over the shared memory
+An inverted index (term -> {document: term frequency}) over every stored
+question and its answer, kept current by save_memory hooks. It answers
+keyword questions the embedding tiers miss without a web search.
+
+A re-saved topic gets a new document and the old one is only marked dead;
+the index is rebuilt once dead documents pile up, or when another process
+has added topics we never saw.
+
+Answers in the cold tier are indexed from the term counts recorded when
+they were frozen (see cold_answers.py), so they are not decompressed.
+"""
+
+import heapq
+import math
+import re
+import threading
+from shared_memory import add_save_hook, add_bulk_save_hook, cached_memory, memory_stats, memory_version
+from cold_answers import is_cold, is_knowledge, answer_key, cold_terms, hydrate
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "did", "do", "does", "for", "from",
+    "how", "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to", "was", "were",
+    "what", "when", "where", "which", "who", "why", "with", "about", "tell", "me", "explain"
+}
+
+TOKEN = re.compile(r"\w+")
+SUFFIXES = ("ations", "ation", "ings", "ing", "ers", "ors", "ies", "ed", "er", "or", "es", "ly", "s")
+
+
+def stem(term):
+    """Crude suffix stripping so 'invented' and 'inventor' meet at 'invent'"""
+    for suffix in SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 4:
+            return term[:-len(suffix)]
+    return term
+
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def term_counts(text):
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class LexicalIndex:
+    def __init__(self, k1=1.2, b=0.75, question_weight=2):
+        self.k1 = k1
+        self.b = b
+        self.question_weight = question_weight  # question terms count this many times
+        self.lock = threading.Lock()
+        self.built = False
+        self.version = None  # memory_version() the index is known to match
+        self.clear()
+
+    def clear(self):
+        self.postings = {}   # term -> {doc: tf}
+        self.doc_topics = []  # doc -> topic (None once dead)
+        self.doc_lengths = []
+        self.docs = {}       # topic -> live doc
+        self.total_length = 0
+        self.dead = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def build(self):
+        """Index every stored topic from scratch"""
+        version = memory_version()
+        with self.lock:
+            self.clear()
+            for topic, answer in cached_memory()["topics"].items():
+                self._add(topic, answer)
+            self.built = True
+            self.version = version
+
+    def ensure_built(self):
+        """Build on first use, and rebuild if another process added topics
+
+        Only when the knowledge base changed since the last look are the
+        stored counters compared with ours (our own saves reach the index
+        through the save hooks, so the counts still agree after them).
+        """
+        if not self.built or self.dead > len(self.docs):
+            self.build()
+            return
+        version = memory_version()
+        if version != self.version:
+            if memory_stats()["knowledge"] != len(self.docs):
+                self.build()
+            else:
+                self.version = version
+
+    def add(self, topic, answer):
+        """save_memory hook: index a newly stored topic"""
+        if not self.built:
+            return
+        with self.lock:
+            self._add(topic, answer)
+
+    def add_many(self, topics, answers):
+        """save_memories hook"""
+        if not self.built:
+            return
+        with self.lock:
+            for topic, answer in zip(topics, answers):
+                self._add(topic, answer)
+
+    def _add(self, topic, answer):
+        old = self.docs.pop(topic, None)
+        if old is not None:
+            self.doc_topics[old] = None
+            self.total_length -= self.doc_lengths[old]
+            self.dead += 1
+        if not is_knowledge(topic, answer):
+            return
+
+        counts = {term: tf * self.question_weight for term, tf in term_counts(topic).items()}
+        if is_cold(answer):
+            answer_counts = cold_terms(answer_key(answer))
+            if answer_counts is None:
+                # Frozen before term counts were recorded
+                answer_counts = term_counts(hydrate(answer))
+        else:
+            answer_counts = term_counts(answer)
+        for term, tf in answer_counts.items():
+            counts[term] = counts.get(term, 0) + tf
+        doc = len(self.doc_topics)
+        self.doc_topics.append(topic)
+        self.doc_lengths.append(sum(counts.values()))
+        self.docs[topic] = doc
+        self.total_length += self.doc_lengths[doc]
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[doc] = tf
+
+    def search(self, query, k=1):
+        """Best k (topic, score) pairs; scores are scaled to 0..1 against a perfect match"""
+        self.ensure_built()
+        terms = set(tokenize(query))
+        with self.lock:
+            n = len(self.docs)
+            if not terms or n == 0:
+                return []
+            avg_length = self.total_length / n
+            scores = {}
+            best_possible = 0.0
+            for term in terms:
+                postings = self.postings.get(term, {})
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                best_possible += idf * (self.k1 + 1)
+                for doc, tf in postings.items():
+                    if self.doc_topics[doc] is None:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc] / avg_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [(self.doc_topics[doc], score / best_possible) for doc, score in best]
+
+
+# Shared index used by the brain's lexical tier
+lexical_index = LexicalIndex()
+add_save_hook(lexical_index.add)
+add_bulk_save_hook(lexical_index.add_many)
@@ -9,8 +9,11 @@ import signal
 import sys
 from agent_alpha import alpha_talk
 from logger import log_event
-from nn_brain import get_brain_stats, load_brain
-from shared_memory import load_memory
+from nn_brain import get_brain_stats, warm_up
+from shared_memory import iter_topics, memory_stats
+from brain_trainer import finish_training
+from training_scheduler import scheduler
+from answer_cache import answer_cache
 
 class SelfLearningAI:
     def __init__(self):
@@ -35,9 +38,6 @@ class SelfLearningAI:
         print("🤖 Self-Learning AI System - Production Mode")
         print("=" * 60)
 
-        # Load existing brain
-        load_brain()
-
         # Show brain statistics
         stats = get_brain_stats()
         print(f"🧠 Brain Status:")
@@ -47,8 +47,7 @@ class SelfLearningAI:
         print(f"   - Model File Exists: {'✅' if stats['model_exists'] else '❌'}")
 
         # Show memory contents
-        memory = load_memory()
-        print(f"\n📚 Current Knowledge Base: {len(memory['topics'])} topics")
+        print(f"\n📚 Current Knowledge Base: {memory_stats()['topics']} topics")
 
         print("\n🎯 System Features:")
         print("   - Real T5 model for question generation")
@@ -60,7 +59,7 @@ class SelfLearningAI:
         print("\n💡 Commands:")
         print("   - Type 'quit' or 'exit' to stop")
         print("   - Type 'stats' to see current statistics")
-        print("   - Type 'memory' to see knowledge base")
+        print("   - Type 'memory [prefix]' to page through the knowledge base")
         print("   - Press Ctrl+C for graceful shutdown")
         print("=" * 60)
 
@@ -71,12 +70,15 @@ class SelfLearningAI:
         print(f"Questions Processed: {self.processed_count}")
         print(f"Learning Sessions: {self.learning_session_count}")
 
+        print("⏳ Finishing background training...")
+        scheduler.flush()
+        finish_training()
+
         stats = get_brain_stats()
         print(f"Final Knowledge Points: {stats['total_knowledge']}")
         print(f"Brain Training Status: {'✅ Trained' if stats['is_trained'] else '❌ Not Trained'}")
 
-        memory = load_memory()
-        print(f"Total Topics in Memory: {len(memory['topics'])}")
+        print(f"Total Topics in Memory: {memory_stats()['topics']}")
         print("\n🎉 Thank you for using Self-Learning AI!")
 
     def handle_special_commands(self, user_input):
@@ -94,18 +96,41 @@ class SelfLearningAI:
             print(f"   - Queue Size: {len(self.question_queue)}")
             print(f"   - Knowledge Points: {stats['total_knowledge']}")
             print(f"   - Brain Trained: {'Yes' if stats['is_trained'] else 'No'}")
+            print(f"   - Model Version: {stats['model_version']}")
+            print(f"   - Index Size: {stats['index_size']}")
+            cache = answer_cache.stats()
+            print(f"   - Answer Cache: {cache['hits']} hits / {cache['misses']} misses ({cache['size']} entries)")
             return True
 
-        elif command == 'memory':
-            memory = load_memory()
-            print(f"\n📚 Knowledge Base ({len(memory['topics'])} topics):")
-            for i, (q, a) in enumerate(memory['topics'].items(), 1):
-                print(f"   {i}. Q: {q}")
-                print(f"      A: {a[:100]}{'...' if len(a) > 100 else ''}")
+        elif command == 'memory' or command.startswith('memory '):
+            self.show_memory(user_input.strip()[len('memory'):].strip() or None)
             return True
 
         return False
 
+    def show_memory(self, prefix=None, page_size=10):
+        """Page through the knowledge base without loading all of it"""
+        if prefix:
+            print(f"\n📚 Knowledge Base (topics starting with '{prefix}'):")
+        else:
+            print(f"\n📚 Knowledge Base ({memory_stats()['topics']} topics):")
+        offset = 0
+        while True:
+            page = list(iter_topics(offset, page_size, prefix=prefix))
+            for i, (q, a) in enumerate(page, offset + 1):
+                print(f"   {i}. Q: {q}")
+                print(f"      A: {a[:100]}{'...' if len(a) > 100 else ''}")
+            offset += len(page)
+            if len(page) < page_size:
+                break
+            try:
+                if input("   -- Enter for more, 'q' to stop -- ").strip().lower() == 'q':
+                    break
+            except EOFError:
+                break
+        if offset == 0:
+            print("   (no topics)")
+
     def process_question(self, question):
         """Process a single question through the AI system"""
         try:
@@ -160,6 +185,10 @@ class SelfLearningAI:
                 self.running = False
                 break
 
+        # Load the encoder and brain once before answering questions
+        if self.running and self.question_queue:
+            warm_up()
+
         # Process questions from queue
         while self.running and self.question_queue:
             try:
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+SQLite storage for the shared memory
+Topics and aliases live in indexed tables of a WAL-mode database, so storing
+one fact is a single upsert instead of rewriting the whole JSON file, and a
+crash can never leave a half-written knowledge base behind. The answer table
+(answer IDs the brain predicts, see shared_memory.intern_answers) is a table
+of the same database.
+
+shared_memory switches to this backend as soon as the database file exists.
+Migrate the existing JSON knowledge base once with:
+    python memory_db.py shared_memory.json shared_memory.db
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from cold_answers import knowledge_key, seed_access
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    question TEXT NOT NULL UNIQUE,
+    answer TEXT
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    alias TEXT PRIMARY KEY,
+    question TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generation (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO generation (id, value) VALUES (0, 0);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answer_counts (
+    digest TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest TEXT NOT NULL UNIQUE,
+    value TEXT NOT NULL
+);
+"""
+
+# Stands for "no row" where None would mean a row holding NULL
+MISSING = object()
+
+
+
+class TableView(MutableMapping):
+    """Dict-like view of the topics or aliases table (reads and writes go to SQL)"""
+
+    def __init__(self, db, table, key, value, on_change=None):
+        self.db = db
+        self.on_change = on_change  # called as on_change(key, old, new) inside the write transaction
+        self.select = f"SELECT {value} FROM {table} WHERE {key} = ?"
+        self.upsert = (f"INSERT INTO {table} ({key}, {value}) VALUES (?, ?) "
+                       f"ON CONFLICT({key}) DO UPDATE SET {value} = excluded.{value}")
+        self.delete = f"DELETE FROM {table} WHERE {key} = ?"
+        self.keys_sql = f"SELECT {key} FROM {table} ORDER BY rowid"
+        self.count_sql = f"SELECT count(*) FROM {table}"
+
+    def __getitem__(self, key):
+        row = self.db.conn.execute(self.select, (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return row[0]
+
+    def __setitem__(self, key, value):
+        with self.db.transaction():
+            old = self.get(key, MISSING) if self.on_change else None
+            self.db.conn.execute(self.upsert, (key, value))
+            if self.on_change:
+                self.on_change(key, old, value)
+            self.db.bump()
+
+    def __delitem__(self, key):
+        with self.db.transaction():
+            old = self.get(key, MISSING) if self.on_change else None
+            if self.db.conn.execute(self.delete, (key,)).rowcount == 0:
+                raise KeyError(key)
+            if self.on_change:
+                self.on_change(key, old, MISSING)
+            self.db.bump()
+
+    def __contains__(self, key):
+        return self.db.conn.execute(self.select, (key,)).fetchone() is not None
+
+    def __iter__(self):
+        return (row[0] for row in self.db.conn.execute(self.keys_sql))
+
+    def __len__(self):
+        return self.db.conn.execute(self.count_sql).fetchone()[0]
+
+
+class MemoryDB:
+    """The knowledge base in SQLite; one connection per thread"""
+
+    def __init__(self, path="shared_memory.db"):
+        self.path = path
+        self.local = threading.local()
+        self.topics = TableView(self, "topics", "question", "answer", on_change=self.count_change)
+        self.aliases = TableView(self, "aliases", "alias", "question")
+        self.conn.executescript(SCHEMA)
+        if self.conn.execute("SELECT count(*) FROM counters").fetchone()[0] == 0:
+            # Database from before the counters existed: count once
+            with self.transaction():
+                self.recount()
+
+    @property
+    def conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+            self.local.depth = 0
+        return conn
+
+    def transaction(self):
+        return Transaction(self)
+
+    def exclusive(self):
+        """Hold the database write lock (a transaction, so reads inside are consistent)"""
+        return Transaction(self)
+
+    def bump(self):
+        self.conn.execute("UPDATE generation SET value = value + 1")
+
+    def version(self):
+        """Write counter, bumped by every change from any process"""
+        return self.conn.execute("SELECT value FROM generation").fetchone()[0]
+
+    def view(self):
+        """The knowledge base shaped like shared_memory.json, backed by live tables"""
+        return {"topics": self.topics, "aliases": self.aliases}
+
+    def load(self):
+        """The whole knowledge base as plain dicts (insertion order kept)"""
+        conn = self.conn
+        data = {"topics": dict(conn.execute("SELECT question, answer FROM topics ORDER BY id"))}
+        aliases = dict(conn.execute("SELECT alias, question FROM aliases ORDER BY rowid"))
+        if aliases:
+            data["aliases"] = aliases
+        for key, value in conn.execute("SELECT key, value FROM meta"):
+            data[key] = json.loads(value)
+        return data
+
+    def iter_topics(self, offset=0, limit=None, newest_first=False, prefix=None):
+        """(question, answer) rows for one page, streamed from a cursor"""
+        sql = "SELECT question, answer FROM topics"
+        params = []
+        if prefix:
+            # A range on the UNIQUE index: [prefix, prefix with its last character bumped)
+            sql += " WHERE question >= ?"
+            params.append(prefix)
+            stem = prefix.rstrip(chr(sys.maxunicode))
+            if stem:
+                sql += " AND question < ?"
+                params.append(stem[:-1] + chr(ord(stem[-1]) + 1))
+        sql += " ORDER BY id DESC" if newest_first else " ORDER BY id"
+        sql += " LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+        return self.conn.execute(sql, params)
+
+    def replace(self, data):
+        """Overwrite the knowledge base with a shared_memory.json-style dict in one transaction"""
+        with self.transaction():
+            conn = self.conn
+            conn.execute("DELETE FROM topics")
+            conn.execute("DELETE FROM aliases")
+            conn.execute("DELETE FROM meta")
+            conn.executemany("INSERT INTO topics (question, answer) VALUES (?, ?)", data["topics"].items())
+            self.recount(data["topics"])
+            conn.executemany("INSERT INTO aliases (alias, question) VALUES (?, ?)", data.get("aliases", {}).items())
+            conn.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in data.items() if key not in ("topics", "aliases")]
+            )
+            self.bump()
+
+    def recount(self, topics=None):
+        """Rebuild the stats counters from the topics (inside a transaction)"""
+        conn = self.conn
+        if topics is None:
+            topics = dict(conn.execute("SELECT question, answer FROM topics"))
+        answer_counts = {}
+        knowledge = 0
+        for question, answer in topics.items():
+            digest = knowledge_key(question, answer)
+            if digest is not None:
+                knowledge += 1
+                answer_counts[digest] = answer_counts.get(digest, 0) + 1
+        conn.execute("DELETE FROM answer_counts")
+        conn.executemany("INSERT INTO answer_counts (digest, count) VALUES (?, ?)", answer_counts.items())
+        conn.execute("DELETE FROM counters")
+        conn.executemany("INSERT INTO counters (name, value) VALUES (?, ?)", [
+            ("topics", len(topics)), ("knowledge", knowledge), ("unique_answers", len(answer_counts))
+        ])
+
+    def add_count(self, name, delta):
+        self.conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (delta, name))
+
+    def count_change(self, question, old, new):
+        """Keep the stats counters in step with one topic write (same transaction)"""
+        conn = self.conn
+        for answer, sign in ((old, -1), (new, 1)):
+            if answer is MISSING:
+                continue
+            self.add_count("topics", sign)
+            digest = knowledge_key(question, answer)
+            if digest is None:
+                continue
+            self.add_count("knowledge", sign)
+            conn.execute(
+                "INSERT INTO answer_counts (digest, count) VALUES (?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET count = count + excluded.count", (digest, sign)
+            )
+            count = conn.execute("SELECT count FROM answer_counts WHERE digest = ?", (digest,)).fetchone()[0]
+            if count == 0:
+                conn.execute("DELETE FROM answer_counts WHERE digest = ?", (digest,))
+                self.add_count("unique_answers", -1)
+            elif count == 1 and sign == 1:
+                self.add_count("unique_answers", 1)
+
+    def stats(self):
+        """Same counters as shared_memory.count_topics, kept up to date by every write"""
+        counters = dict(self.conn.execute("SELECT name, value FROM counters"))
+        return {name: counters.get(name, 0) for name in ("topics", "knowledge", "unique_answers")}
+
+    # -- answer table ------------------------------------------------------
+    # IDs are never reused (AUTOINCREMENT), so a model trained on a dropped
+    # answer can never name a different one.
+
+    def answer_ids(self, digests):
+        """Answer ID of each digest (None where the answer is not in the table)"""
+        digests = list(digests)
+        found = {}
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            found.update(self.conn.execute(
+                f"SELECT digest, id FROM answers WHERE digest IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return [found.get(digest) for digest in digests]
+
+    def add_answers(self, rows):
+        """Add (id or None, digest, value) rows for digests not in the table yet"""
+        with self.transaction():
+            self.conn.executemany("INSERT OR IGNORE INTO answers (id, digest, value) VALUES (?, ?, ?)", rows)
+
+    def answer_value(self, answer_id):
+        row = self.conn.execute("SELECT value FROM answers WHERE id = ?", (answer_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def answer_count(self):
+        return self.conn.execute("SELECT count(*) FROM answers").fetchone()[0]
+
+    def rewrite_answers(self):
+        """Store each answer in the tier its topics hold it in and drop answers no topic holds
+
+        Reads the topics in the same transaction, so an answer saved meanwhile
+        is never dropped. Returns the number of answers dropped.
+        """
+        with self.transaction():
+            conn = self.conn
+            values = {}
+            for question, answer in conn.execute("SELECT question, answer FROM topics"):
+                digest = knowledge_key(question, answer)
+                if digest is not None:
+                    values[digest] = answer
+            conn.executemany("UPDATE answers SET value = ? WHERE digest = ? AND value != ?",
+                             [(value, digest, value) for digest, value in values.items()])
+            unused = [(digest,) for (digest,) in conn.execute("SELECT digest FROM answers") if digest not in values]
+            conn.executemany("DELETE FROM answers WHERE digest = ?", unused)
+        return len(unused)
+
+    def compact(self):
+        """Give free pages back to the file system and empty the WAL"""
+        self.conn.execute("VACUUM")
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self.local.conn = None
+
+
+class Transaction:
+    """BEGIN IMMEDIATE ... COMMIT; nested uses join the outermost transaction"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        conn = self.db.conn
+        if self.db.local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self.db.local.depth += 1
+        return conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.db.local.depth -= 1
+        if self.db.local.depth == 0:
+            self.db.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+def migrate(json_path="shared_memory.json", db_path="shared_memory.db"):
+    """One-shot import of the JSON knowledge base into a new SQLite database"""
+    if os.path.exists(db_path):
+        print(f"⚠️ {db_path} already exists; remove it first to migrate again.")
+        return False
+    with open(json_path) as f:
+        data = json.load(f)
+    db = MemoryDB(db_path)
+    db.replace(data)
+    # The archive's idle clock starts at the migration, not at 1970
+    seed_access(data["topics"].values())
+    stats = db.stats()
+    db.close()
+    print(f"✅ Migrated {stats['topics']} topics from {json_path} to {db_path}.")
+    print(f"   {json_path} is no longer read and can be kept as a backup.")
+    return True
+
+
+if __name__ == "__main__":
+    migrate(*sys.argv[1:3])
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Log-structured storage for the shared memory
+Every write appends one JSON line to a journal; nothing is rewritten in place.
+A snapshot file holds the state as of the last compaction in the same line
+format. At startup both files are scanned once to build an in-memory index of
+question -> file offset, so lookups read a single line from disk.
+
+A background compactor writes a fresh snapshot and starts an empty journal
+once the journal has grown past `compact_bytes`.
+
+shared_memory switches to this backend as soon as the journal file exists.
+Convert the existing JSON knowledge base once with:
+    python memory_journal.py shared_memory.json shared_memory_journal.jsonl
+
+Records are JSON lists:
+    ["t", question, answer]   store a topic      ["dt", question]  delete it
+    ["a", alias, question]    store an alias     ["da", alias]     delete it
+    ["m", key, value]         other top-level key of shared_memory.json
+    ["n", id, digest, value]  store an answer-table entry (see
+                              shared_memory.intern_answers)
+    ["dn", id, digest]        drop it            ["ni", id]        next answer ID
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from itertools import islice
+from collections.abc import MutableMapping
+from file_lock import FileLock
+from cold_answers import knowledge_key, seed_access
+
+
+
+class JournalView(MutableMapping):
+    """Dict-like view of the topics or aliases, reading values from disk"""
+
+    def __init__(self, journal, kind):
+        self.journal = journal
+        self.kind = kind
+
+    def entries(self):
+        return self.journal.topics if self.kind == "t" else self.journal.aliases
+
+    def __getitem__(self, key):
+        self.journal.refresh()
+        location = self.entries()[key]
+        return self.journal.read_record(location)[2]
+
+    def __setitem__(self, key, value):
+        self.journal.append([self.kind, key, value])
+
+    def __delitem__(self, key):
+        self.journal.refresh()
+        if key not in self.entries():
+            raise KeyError(key)
+        self.journal.append(["d" + self.kind, key])
+
+    def __contains__(self, key):
+        self.journal.refresh()
+        return key in self.entries()
+
+    def __iter__(self):
+        self.journal.refresh()
+        return iter(list(self.entries()))
+
+    def __len__(self):
+        self.journal.refresh()
+        return len(self.entries())
+
+
+class MemoryJournal:
+    def __init__(self, journal_path="shared_memory_journal.jsonl", compact_bytes=4 << 20, compact_interval=60):
+        self.journal_path = journal_path
+        self.snapshot_path = os.path.splitext(journal_path)[0] + "_snapshot.jsonl"
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+
+        # file_lock orders writers across processes (always taken before lock);
+        # lock guards this process's index
+        self.file_lock = FileLock(journal_path + ".lock")
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.topics = {}   # question -> (path, offset)
+        self.aliases = {}  # alias -> (path, offset)
+        self.meta = {}
+        self.answer_counts = {}  # answer digest -> number of topics holding it
+        self.knowledge = 0
+        self.answers = {}          # answer digest -> answer ID
+        self.answer_locations = {}  # answer ID -> (path, offset)
+        self.next_answer_id = 0    # IDs are never reused, even after a drop
+        self.identity = None
+        self.journal_end = 0
+        self.compactor = None
+        self.topics_view = JournalView(self, "t")
+        self.aliases_view = JournalView(self, "a")
+        self.refresh()
+
+    # -- index -------------------------------------------------------------
+
+    def file_identity(self):
+        ids = []
+        for path in (self.snapshot_path, self.journal_path):
+            try:
+                st = os.stat(path)
+                ids.append((st.st_dev, st.st_ino))
+            except OSError:
+                ids.append(None)
+        return ids
+
+    def refresh(self):
+        """Index records appended since the last look (rebuilding after another process compacted)"""
+        with self.lock:
+            identity = self.file_identity()
+            if identity != self.identity:
+                self.topics, self.aliases, self.meta = {}, {}, {}
+                self.answer_counts, self.knowledge = {}, 0
+                self.answers, self.answer_locations, self.next_answer_id = {}, {}, 0
+                self.journal_end = 0
+                self.scan(self.snapshot_path, 0)
+                self.identity = identity
+            try:
+                size = os.path.getsize(self.journal_path)
+            except OSError:
+                size = 0
+            if size > self.journal_end:
+                self.journal_end = self.scan(self.journal_path, self.journal_end)
+
+    def scan(self, path, start):
+        """Apply every complete record of a file from `start`; returns the offset reached"""
+        if not os.path.exists(path):
+            return start
+        offset = start
+        with open(path, "rb") as f:
+            f.seek(start)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # half-written record, picked up once complete
+                try:
+                    self.apply(json.loads(line), (path, offset))
+                except (ValueError, IndexError):
+                    pass  # damaged record
+                offset += len(line)
+        return offset
+
+    def apply(self, record, location):
+        kind = record[0]
+        if kind == "t":
+            self.forget_topic(record[1])
+            self.topics[record[1]] = location
+            self.count_answer(knowledge_key(record[1], record[2]), 1)
+        elif kind == "dt":
+            self.forget_topic(record[1])
+            self.topics.pop(record[1], None)
+        elif kind == "a":
+            self.aliases[record[1]] = location
+        elif kind == "da":
+            self.aliases.pop(record[1], None)
+        elif kind == "m":
+            self.meta[record[1]] = record[2]
+        elif kind == "n":
+            self.answers[record[2]] = record[1]
+            self.answer_locations[record[1]] = location
+            self.next_answer_id = max(self.next_answer_id, record[1] + 1)
+        elif kind == "dn":
+            self.answers.pop(record[2], None)
+            self.answer_locations.pop(record[1], None)
+        elif kind == "ni":
+            self.next_answer_id = max(self.next_answer_id, record[1])
+
+    def forget_topic(self, question):
+        """Take a topic's current answer out of the counters before it changes"""
+        location = self.topics.get(question)
+        if location is not None:
+            old = self.read_record(location)
+            self.count_answer(knowledge_key(old[1], old[2]), -1)
+
+    def count_answer(self, digest, delta):
+        if digest is None:
+            return
+        self.knowledge += delta
+        count = self.answer_counts.get(digest, 0) + delta
+        if count:
+            self.answer_counts[digest] = count
+        else:
+            self.answer_counts.pop(digest, None)
+
+    def read_record(self, location):
+        path, offset = location
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    # -- writes --------------------------------------------------------------
+
+    def transaction(self):
+        return JournalBatch(self)
+
+    def exclusive(self):
+        """Keep every other writer (in any process) out"""
+        return self.file_lock
+
+    def version(self):
+        """Changes whenever any process appends or compacts"""
+        with self.lock:
+            self.refresh()
+            return [self.identity, self.journal_end]
+
+    def append(self, record):
+        """Write one record (buffered until the enclosing transaction ends)"""
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is not None:
+            buffer.append(record)
+            return
+        self.write([record])
+
+    def write(self, records):
+        """Append records to the journal in one write and index them"""
+        if not records:
+            return
+        data = b"".join((json.dumps(record) + "\n").encode("utf-8") for record in records)
+        with self.file_lock, self.lock:
+            self.refresh()
+            with open(self.journal_path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.refresh()
+        self.start_compactor()
+
+    def replace(self, data):
+        """Overwrite the whole knowledge base (becomes the new snapshot)"""
+        with self.file_lock, self.lock:
+            self.write_snapshot(data)
+
+    def write_snapshot(self, data):
+        """Atomically install data as the snapshot and start an empty journal
+
+        The answer table is carried over as it is.
+        """
+        records = [["t", q, a] for q, a in data["topics"].items()]
+        records += [["a", alias, q] for alias, q in data.get("aliases", {}).items()]
+        records += [["m", key, value] for key, value in data.items() if key not in ("topics", "aliases")]
+        records += self.answer_records()
+        records.append(["ni", self.next_answer_id])
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for record in records:
+                f.write((json.dumps(record) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # A crash here only replays journal records the snapshot already holds
+        tmp_path = self.journal_path + ".tmp"
+        open(tmp_path, "wb").close()
+        os.replace(tmp_path, self.journal_path)
+        self.identity = None
+        self.refresh()
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot"""
+        with self.file_lock, self.lock:
+            self.refresh()
+            if self.journal_end == 0:
+                return False
+            self.write_snapshot(self.load())
+        return True
+
+    def start_compactor(self):
+        if self.compactor is None or not self.compactor.is_alive():
+            self.compactor = threading.Thread(target=self.compact_loop, name="memory-compactor", daemon=True)
+            self.compactor.start()
+
+    def compact_loop(self):
+        while True:
+            time.sleep(self.compact_interval)
+            try:
+                if os.path.getsize(self.journal_path) >= self.compact_bytes:
+                    self.compact()
+            except OSError:
+                pass
+
+    # -- answer table --------------------------------------------------------
+
+    def answer_ids(self, digests):
+        """Answer ID of each digest (None where the answer is not in the table)"""
+        with self.lock:
+            self.refresh()
+            return [self.answers.get(digest) for digest in digests]
+
+    def add_answers(self, rows):
+        """Add (id or None, digest, value) rows for digests not in the table yet"""
+        with self.file_lock, self.lock:
+            self.refresh()
+            records, next_id = [], self.next_answer_id
+            for answer_id, digest, value in rows:
+                if digest in self.answers:
+                    continue
+                if answer_id is None:
+                    answer_id = next_id
+                next_id = max(next_id, answer_id + 1)
+                records.append(["n", answer_id, digest, value])
+            self.write(records)
+
+    def answer_value(self, answer_id):
+        with self.lock:
+            self.refresh()
+            location = self.answer_locations.get(answer_id)
+        if location is None:
+            return None
+        try:
+            record = self.read_record(location)
+        except (OSError, ValueError):
+            record = None
+        if record is None or record[:2] != ["n", answer_id]:
+            # Another process compacted since the location was looked up
+            with self.lock:
+                self.identity = None
+                self.refresh()
+                location = self.answer_locations.get(answer_id)
+            return None if location is None else self.read_record(location)[3]
+        return record[3]
+
+    def answer_count(self):
+        with self.lock:
+            self.refresh()
+            return len(self.answers)
+
+    def answer_records(self):
+        """The live ["n", id, digest, value] records, read in sequential passes (lock held)"""
+        wanted = set(self.answer_locations.values())
+        records = []
+        for path in (self.snapshot_path, self.journal_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    location = (path, offset)
+                    offset += len(line)
+                    if location in wanted and line.endswith(b"\n"):
+                        records.append(json.loads(line))
+        return records
+
+    def rewrite_answers(self):
+        """Store each answer in the tier its topics hold it in and drop answers no topic holds
+
+        Reads the topics under the journal lock, so an answer saved meanwhile
+        is never dropped. Returns the number of answers dropped.
+        """
+        with self.file_lock, self.lock:
+            values = {}
+            for question, answer in self.load()["topics"].items():
+                digest = knowledge_key(question, answer)
+                if digest is not None:
+                    values[digest] = answer
+            records, dropped = [], 0
+            for _, answer_id, digest, value in self.answer_records():
+                if digest not in values:
+                    records.append(["dn", answer_id, digest])
+                    dropped += 1
+                elif values[digest] != value:
+                    records.append(["n", answer_id, digest, values[digest]])
+            self.write(records)
+        return dropped
+
+    # -- reads ---------------------------------------------------------------
+
+    def view(self):
+        """The knowledge base shaped like shared_memory.json, backed by the journal"""
+        return {"topics": self.topics_view, "aliases": self.aliases_view}
+
+    def load(self):
+        """The whole knowledge base as plain dicts, read in two sequential passes"""
+        with self.lock:
+            self.refresh()
+            topics = dict.fromkeys(self.topics)
+            aliases = dict.fromkeys(self.aliases)
+            for path in (self.snapshot_path, self.journal_path):
+                if not os.path.exists(path):
+                    continue
+                with open(path, "rb") as f:
+                    offset = 0
+                    for line in f:
+                        location = (path, offset)
+                        offset += len(line)
+                        if not line.endswith(b"\n"):
+                            break
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue
+                        if record[0] == "t" and self.topics.get(record[1]) == location:
+                            topics[record[1]] = record[2]
+                        elif record[0] == "a" and self.aliases.get(record[1]) == location:
+                            aliases[record[1]] = record[2]
+            data = {"topics": topics}
+            if aliases:
+                data["aliases"] = aliases
+            data.update(self.meta)
+            return data
+
+    def iter_topics(self, offset=0, limit=None, newest_first=False, prefix=None):
+        """(question, answer) pairs for one page, reading only those records from disk"""
+        with self.lock:
+            self.refresh()
+            questions = reversed(self.topics) if newest_first else iter(self.topics)
+            if prefix:
+                questions = (question for question in questions if question.startswith(prefix))
+            page = [(question, self.topics[question])
+                    for question in islice(questions, offset, None if limit is None else offset + limit)]
+        for question, location in page:
+            try:
+                record = self.read_record(location)
+            except (OSError, ValueError):
+                record = None
+            if record is None or record[:2] != ["t", question]:
+                # Another process compacted since the page was picked
+                try:
+                    record = [None, question, self.topics_view[question]]
+                except KeyError:
+                    continue
+            yield question, record[2]
+
+    def stats(self):
+        """Same counters as shared_memory.count_topics, kept up to date while indexing"""
+        with self.lock:
+            self.refresh()
+            return {
+                "topics": len(self.topics),
+                "knowledge": self.knowledge,
+                "unique_answers": len(self.answer_counts)
+            }
+
+
+class JournalBatch:
+    """Buffers appends so a group of writes lands in the journal as one write"""
+
+    def __init__(self, journal):
+        self.journal = journal
+
+    def __enter__(self):
+        local = self.journal.local
+        self.outer = getattr(local, "buffer", None) is not None
+        if not self.outer:
+            local.buffer = []
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.outer:
+            return False
+        records, self.journal.local.buffer = self.journal.local.buffer, None
+        if exc_type is None:
+            self.journal.write(records)
+        return False
+
+
+def migrate(json_path="shared_memory.json", journal_path="shared_memory_journal.jsonl"):
+    """One-shot conversion of the JSON knowledge base into a journal snapshot"""
+    if os.path.exists(journal_path):
+        print(f"⚠️ {journal_path} already exists; remove it first to migrate again.")
+        return False
+    with open(json_path) as f:
+        data = json.load(f)
+    journal = MemoryJournal(journal_path)
+    journal.replace(data)
+    # The archive's idle clock starts at the migration, not at 1970
+    seed_access(data["topics"].values())
+    print(f"✅ Migrated {journal.stats()['topics']} topics from {json_path} to {journal.snapshot_path}.")
+    print(f"   {json_path} is no longer read and can be kept as a backup.")
+    return True
+
+
+if __name__ == "__main__":
+    migrate(*sys.argv[1:3])
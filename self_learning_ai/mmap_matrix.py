@@ -0,0 +1,99 @@
+"""
+Growable memory-mapped float32 matrices and the row logs that index them
+Shared by the embedding store and the vector index. The matrix lives in an
+.npy file that is replaced by a copy with doubled capacity when it is full,
+and a row log (one header line naming its generation, then one line per
+row) says which rows are in use. Callers hold their own file lock around
+every method here.
+"""
+
+import os
+import numpy as np
+
+
+def file_id(path):
+    """Changes whenever the file is replaced, grows or is written"""
+    try:
+        st = os.stat(path)
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def new_generation():
+    """Random name for a fresh row log"""
+    return os.urandom(8).hex()
+
+
+def start_log(path, header):
+    """Atomically replace a row log with just its header line; returns the log's end"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+    os.replace(tmp_path, path)
+    return len(header)
+
+
+def read_log(f, end):
+    """Complete lines of an open row log past offset end; returns (lines, new end)"""
+    f.seek(end)
+    lines = []
+    for line in f:
+        if not line.endswith(b"\n"):
+            break  # half-written line, picked up once it is complete
+        lines.append(line)
+        end += len(line)
+    return lines, end
+
+
+class MappedMatrix:
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.id = None
+
+    def forget(self):
+        """Drop the mapping; the next refresh() maps the file again"""
+        self.data = None
+        self.id = None
+
+    def refresh(self):
+        """Map the file again if another process replaced or wrote it"""
+        current = file_id(self.path)
+        if current != self.id:
+            self.data = np.load(self.path, mmap_mode="r+") if current else None
+            self.id = current
+
+    def ensure_capacity(self, needed, dim, used):
+        """Reallocate with doubled capacity when full, keeping the first `used` rows"""
+        if self.data is not None and self.data.shape[0] >= needed and self.data.shape[1] == dim:
+            return
+        capacity = max(1024, needed, 0 if self.data is None else self.data.shape[0] * 2)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(capacity, dim))
+        if self.data is not None and self.data.shape[1] == dim and used:
+            grown[:used] = self.data[:used]
+        grown.flush()
+        del grown
+        # Drop the old mapping before replacing the file (required on Windows)
+        self.data = None
+        os.replace(tmp_path, self.path)
+        self.data = np.load(self.path, mmap_mode="r+")
+        self.id = file_id(self.path)
+
+    def write(self, rows, vecs, log_path, lines):
+        """Store vectors in their rows, then log the new rows; returns the log's end (None if nothing was logged)"""
+        self.data[rows] = vecs
+        end = None
+        if lines:
+            # Vectors first, so a logged row always has its vector
+            self.data.flush()
+            with open(log_path, "ab") as f:
+                f.write("".join(lines).encode("utf-8"))
+                end = f.tell()
+        self.id = file_id(self.path)
+        return end
+
+    def flush(self):
+        if self.data is not None:
+            self.data.flush()
@@ -1,58 +1,486 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.neural_network import MLPClassifier
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+import copy
 import json
-import pickle
+import random
 import os
+import time
+import threading
+from embedding_store import EmbeddingStore
+from vector_index import VectorIndex
+from lexical_index import lexical_index
+from cold_answers import answer_key, answer_of, is_answer, is_knowledge
+from brain_snapshot import save_snapshot, load_snapshot, snapshot_exists, snapshot_lock, make_writable
+from shared_memory import (
+    add_save_hook, add_bulk_save_hook, set_duplicate_finder, memory_stats, intern_answers, answer_text,
+    load_memory, write_memory, memory_version, cached_memory, write_json
+)
 
-# Initialize the sentence transformer model
-model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-clf = MLPClassifier(hidden_layer_sizes=(256, 128, 64), max_iter=1000, random_state=42)
+# The sentence transformer and classifier are loaded on first real use, so
+# commands that only show stats or memory never pay for torch and the model
+model_name = "paraphrase-MiniLM-L6-v2"
+model = None
+clf = None
 
-# Cache for embeddings to speed up processing
-embedding_cache = {}
-model_file = "brain_model.pkl"
+# Texts per SentenceTransformer batch when encoding many topics at once
+encode_batch_size = 256
 
-def load_training_data():
-    """Load and prepare training data from shared memory"""
-    with open("shared_memory.json") as f:
-        data = json.load(f)
+# Unix socket of a shared embedding server (see embedding_server.py); when
+# set, texts are encoded there and this process never loads the model
+embedding_socket = os.environ.get("EMBEDDING_SOCKET")
 
-    X, y, questions = [], [], []
-    for topic, answer in data["topics"].items():
-        # Skip invalid entries
-        if not topic or not answer or answer == "No result found.":
-            continue
+# Split the brain into one classifier and index per topic category, trained
+# in parallel processes (see sharded_brain.py)
+sharded = os.environ.get("BRAIN_SHARDS") == "1"
+
+# Persistent embedding store so restarts only encode new topics
+embedding_store = None
+model_file = "brain_model.pkl"   # legacy pickle, see brain_snapshot.convert_pickle
+snapshot_dir = "brain_snapshot"
+meta_file = "brain_meta.json"
+trained_file = "brain_trained_topics.json"
+
+# Bumped whenever saved models become incompatible (embeddings, label encoding)
+BRAIN_FORMAT = 2
+
+# Nearest-neighbour index over question embeddings for the similarity fallback
+vector_index = None
+
+# Minimum classifier confidence and question similarity for a brain answer
+confidence_threshold = 0.3
+similarity_threshold = 0.7
+
+# Minimum BM25 score (0..1, see lexical_index.py) for a keyword answer when
+# both embedding tiers miss
+lexical_threshold = 0.5
+
+# Questions at least this similar to a stored one are filed as aliases of it
+duplicate_threshold = 0.92
+
+# Incremental training settings
+full_rebuild_every = 50   # incremental updates allowed between full rebuilds
+incremental_epochs = 10   # partial_fit passes over each batch of new samples (at least)
+incremental_max_epochs = 200  # passes allowed before giving up and rebuilding
+replay_size = 64          # already-learned samples mixed into each update
+
+# Topics the current model was trained on (topic -> answer digest)
+trained_topics = {}
+updates_since_rebuild = 0
+
+# Small metadata about the saved brain, re-read only when the file changes
+brain_meta = None
+brain_meta_stamp = None
+# model_version of the classifier loaded in this process
+loaded_version = None
+
+# Training builds a new classifier off to the side and swaps it in under
+# brain_lock, which also guards the embedding store and vector index, so
+# readers always see one consistent model. training_lock serialises runs.
+brain_lock = threading.RLock()
+training_lock = threading.RLock()
+
+def get_model():
+    """The sentence transformer, loaded on first use"""
+    global model
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+    return model
 
-        # Use cached embedding if available
-        if topic in embedding_cache:
-            vec = embedding_cache[topic]
+def new_classifier():
+    """A fresh, untrained answer classifier"""
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(hidden_layer_sizes=(256, 128, 64), max_iter=1000, random_state=42)
+
+def get_embedding_store():
+    """The on-disk embedding store, opened on first use"""
+    global embedding_store
+    if embedding_store is None:
+        embedding_store = EmbeddingStore("embeddings.npy", model_name)
+    return embedding_store
+
+def get_vector_index():
+    """The nearest-neighbour index, opened on first use"""
+    global vector_index
+    if vector_index is None:
+        vector_index = VectorIndex("brain_index.npy")
+    return vector_index
+
+def is_trained():
+    """Whether a trained classifier is loaded in this process"""
+    if sharded:
+        import sharded_brain
+        return sharded_brain.is_trained()
+    return clf is not None and hasattr(clf, 'classes_')
+
+def is_stale():
+    """Whether another process (e.g. auto_learning.py) saved a newer brain than the loaded one"""
+    if sharded:
+        import sharded_brain
+        return sharded_brain.is_stale()
+    return loaded_version is not None and loaded_version != model_version()
+
+def warm_up():
+    """Load the encoder, classifier and index up front (for long-running modes)"""
+    if not embedding_socket:
+        get_model()
+    get_embedding_store()
+    get_vector_index()
+    if not is_trained():
+        load_brain()
+
+def read_topics():
+    """The topic -> answer mapping from shared memory (cached; do not modify)"""
+    return cached_memory()["topics"]
+
+def encode_texts(texts, batch_size=None):
+    """Encode texts in batches into a contiguous matrix of unit-length float32 rows"""
+    texts = list(texts)
+    if embedding_socket:
+        from embedding_server import encode
+        return encode(texts, embedding_socket, model_name)
+    if not texts:
+        return np.zeros((0, get_model().get_sentence_embedding_dimension()), dtype=np.float32)
+    vecs = get_model().encode(
+        texts,
+        batch_size=batch_size or encode_batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return np.ascontiguousarray(vecs, dtype=np.float32)
+
+def embed_topics(topics):
+    """Embeddings for stored topics, batch-encoding only those the store lacks"""
+    store = get_embedding_store()
+    with brain_lock:
+        vecs, missing = store.get_many(topics)
+    if missing:
+        encoded = encode_texts([topics[i] for i in missing])
+        with brain_lock:
+            store.add_many([topics[i] for i in missing], encoded)
+        if vecs is None:
+            vecs = encoded
         else:
-            vec = model.encode(topic)
-            embedding_cache[topic] = vec
+            vecs[missing] = encoded
+    if vecs is None:
+        vecs = encode_texts([])
+    return vecs
+
+def load_training_data(skip=None):
+    """Load and prepare training data from shared memory
+
+    Topics found in `skip` with an unchanged answer are left out, which is how
+    incremental training picks up only the knowledge learned since last time.
+    """
+    y, questions = [], []
+    for topic, answer in read_topics().items():
+        # Skip invalid entries
+        if not is_knowledge(topic, answer):
+            continue
+        if skip and skip.get(topic) == answer_key(answer):
+            continue
 
-        X.append(vec)
         y.append(answer)
         questions.append(topic)
 
-    return np.array(X), y, questions
+    X = embed_topics(questions)
+    with brain_lock:
+        get_embedding_store().flush()
+    return X, y, questions
+
+def sync_index(X, questions):
+    """Add any questions the vector index does not hold yet"""
+    index = get_vector_index()
+    with brain_lock:
+        missing = [i for i, q in enumerate(questions) if q not in index]
+        if missing:
+            index.add_many([questions[i] for i in missing], X[missing])
+
+def index_topic(question, answer):
+    """save_memory hook: make a newly stored topic searchable right away"""
+    if not is_knowledge(question, answer):
+        return
+    vec = embed_topics([question])
+    if sharded:
+        import sharded_brain
+        sharded_brain.index_topics([question], vec)
+        return
+    with brain_lock:
+        get_vector_index().add(question, vec)
+
+add_save_hook(index_topic)
+
+def index_topics(questions, answers):
+    """save_memories hook: batch-encode a bulk import and add it to the index in one go"""
+    questions = [q for q, a in zip(questions, answers) if is_knowledge(q, a)]
+    if not questions:
+        return
+    vecs = embed_topics(questions)
+    with brain_lock:
+        get_embedding_store().flush()
+    if sharded:
+        import sharded_brain
+        sharded_brain.index_topics(questions, vecs)
+        return
+    with brain_lock:
+        get_vector_index().add_many(questions, vecs)
+
+add_bulk_save_hook(index_topics)
+
+def find_duplicate(question):
+    """save_memory duplicate finder: a stored question saying the same thing, or None"""
+    index = get_vector_index()
+    if len(index) == 0:
+        return None
+    vec = embed_topics([question])
+    with brain_lock:
+        matches = index.search(vec, k=1)
+    if matches and matches[0][1] >= duplicate_threshold and matches[0][0] != question:
+        return matches[0][0]
+    return None
+
+set_duplicate_finder(find_duplicate)
+
+def find_known(questions):
+    """The stored question each one is already answered under, or None
+
+    Only exact, alias and similarity matches above similarity_threshold count:
+    the brain tier's argmax is confident even on unrelated questions.
+    """
+    questions = list(questions)
+    data = cached_memory()
+    topics, aliases = data["topics"], data.get("aliases", {})
+    known = [None] * len(questions)
+
+    def answered(question):
+        return is_answer(topics.get(question))
+
+    pending = []
+    for i, question in enumerate(questions):
+        target = question if question in topics else aliases.get(question)
+        if target and answered(target):
+            known[i] = target
+        else:
+            pending.append(i)
+    if not pending:
+        return known
+
+    vecs = encode_texts([questions[i] for i in pending])
+    if sharded:
+        import sharded_brain
+        matches = sharded_brain.nearest(vecs)
+    else:
+        index = get_vector_index()
+        if len(index) == 0:
+            return known
+        with brain_lock:
+            matches = [found[0] if found else (None, -1.0) for found in index.search_many(vecs, k=1)]
+    for i, (match, similarity) in zip(pending, matches):
+        if similarity > similarity_threshold and answered(match):
+            known[i] = match
+    return known
+
+def consolidate_memory(threshold=None):
+    """Offline pass folding near-duplicate questions already in shared memory
+
+    Questions are visited oldest first; each one that is a near-duplicate of
+    an earlier kept question becomes an alias of it. The brain is rebuilt
+    afterwards so the classifier and index lose the merged classes.
+    Returns the number of questions merged.
+    """
+    threshold = threshold or duplicate_threshold
+    for attempt in range(3):
+        version = memory_version()
+        data = load_memory(hydrate=False)
+        merged = merge_duplicates(data, threshold)
+        if not merged or write_memory(data, expected_version=version):
+            break
+        print("⚠️ Knowledge base changed during consolidation, retrying...")
+    else:
+        print("❌ Knowledge base kept changing; consolidation skipped.")
+        return 0
+
+    if merged:
+        with brain_lock:
+            get_vector_index().clear()
+        train_brain(full=True)
+    print(f"🧹 Merged {merged} near-duplicate questions ({len(data['topics'])} topics remain).")
+    return merged
+
+def merge_duplicates(data, threshold):
+    """Fold near-duplicate topics of a loaded knowledge base into aliases; returns how many"""
+    topics = data["topics"]
+    aliases = data.setdefault("aliases", {})
+    questions = [q for q, a in topics.items() if is_knowledge(q, a)]
+    if len(questions) < 2:
+        return 0
+
+    vecs = embed_topics(questions)
+    sync_index(vecs, questions)
+    rank = {q: i for i, q in enumerate(questions)}
+    merged = 0
+    for start in range(0, len(questions), 1024):
+        with brain_lock:
+            results = get_vector_index().search_many(vecs[start:start + 1024], k=5)
+        for offset, matches in enumerate(results):
+            question = questions[start + offset]
+            for match, score in matches:
+                if score < threshold:
+                    break
+                # Only fold into an earlier question that is itself still kept
+                if rank.get(match, len(questions)) < rank[question] and match in topics:
+                    aliases[question] = match
+                    del topics[question]
+                    merged += 1
+                    break
+
+    # Point older aliases at the surviving question
+    for alias, target in aliases.items():
+        while target in aliases:
+            target = aliases[target]
+        aliases[alias] = target
+    return merged
+
+def grow_classes(net, labels):
+    """Add output units to a trained classifier for labels it has never seen
+
+    Existing weights are kept in place; new units start from small random
+    weights. Returns False when the network cannot be grown in place (a binary
+    model has a single logistic output), in which case a full rebuild is needed.
+    """
+    new_classes = np.union1d(net.classes_, np.asarray(labels))
+    if len(new_classes) == len(net.classes_):
+        return True
+    if net.n_outputs_ == 1:
+        return False
+
+    from sklearn.preprocessing import LabelBinarizer
+    old_coef, old_intercept = net.coefs_[-1], net.intercepts_[-1]
+    fan_in = old_coef.shape[0]
+    bound = np.sqrt(2.0 / (fan_in + len(new_classes)))
+    rng = np.random.RandomState(len(new_classes))
+
+    coef = rng.uniform(-bound, bound, (fan_in, len(new_classes))).astype(old_coef.dtype)
+    intercept = np.zeros(len(new_classes), dtype=old_intercept.dtype)
+    cols = np.searchsorted(new_classes, net.classes_)
+    coef[:, cols] = old_coef
+    intercept[cols] = old_intercept
+
+    net.coefs_[-1] = coef
+    net.intercepts_[-1] = intercept
+    net._label_binarizer = LabelBinarizer().fit(new_classes)
+    net.classes_ = net._label_binarizer.classes_
+    net.n_outputs_ = len(new_classes)
 
-def train_brain():
-    """Train the neural network brain with current knowledge"""
-    X, y, _ = load_training_data()
+    # Optimizer moments are shaped like the old layers, so start it afresh
+    if hasattr(net, "_optimizer"):
+        del net._optimizer
+    return True
+
+def incremental_fit(net, X, y, epochs=None):
+    """Update a trained classifier with a small batch of samples
+
+    Keeps fitting until every sample in the batch is predicted with its own
+    label above confidence_threshold. Returns False if a new label cannot be
+    added or the batch is still not learned after incremental_max_epochs
+    passes, so the caller rebuilds instead of serving confident wrong answers.
+    """
+    if not grow_classes(net, y):
+        return False
+    y = np.asarray(y)
+    for epoch in range(1, incremental_max_epochs + 1):
+        net.partial_fit(X, y)
+        if epoch < (epochs or incremental_epochs):
+            continue
+        proba = net.predict_proba(X)
+        best = proba.argmax(axis=1)
+        if np.all(net.classes_[best] == y) and np.all(proba[np.arange(len(y)), best] > confidence_threshold):
+            return True
+    return False
+
+def training_copy(net):
+    """Independent copy of a trained classifier that can be updated while `net` keeps serving"""
+    twin = make_writable(copy.copy(net))
+    # The optimizer holds references to the old weight arrays
+    twin.__dict__.pop("_optimizer", None)
+    if hasattr(twin, "loss_curve_"):
+        twin.loss_curve_ = list(twin.loss_curve_)
+    return twin
+
+def replay_sample(topics, size):
+    """Pick a few already-learned pairs to mix into an incremental update"""
+    learned = random.sample(list(trained_topics), min(size, len(trained_topics)))
+    learned = [
+        topic for topic in learned
+        if topics.get(topic) and trained_topics[topic] == answer_key(topics[topic])
+    ]
+    return embed_topics(learned), [topics[topic] for topic in learned]
+
+def file_stamp(path):
+    """Cheap change marker for a file that is replaced on every save"""
+    try:
+        st = os.stat(path)
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+def read_brain_meta():
+    """Metadata of the saved brain (cached until another process saves a new one)"""
+    global brain_meta, brain_meta_stamp
+    stamp = file_stamp(meta_file)
+    if brain_meta is None or stamp != brain_meta_stamp:
+        try:
+            with open(meta_file) as f:
+                brain_meta = json.load(f)
+        except (OSError, ValueError):
+            brain_meta = {}
+        brain_meta_stamp = stamp
+    return brain_meta
+
+def save_brain():
+    """Persist the classifier, the record of what it was trained on and its metadata"""
+    global brain_meta, brain_meta_stamp, loaded_version
+    index = get_vector_index()
+    with brain_lock:
+        index.flush()
+
+    # One lock over all three files, so concurrent saves never mix two models
+    with snapshot_lock(snapshot_dir):
+        save_snapshot(clf, snapshot_dir)
+        write_json(trained_file, trained_topics)
+        brain_meta = {
+            "model_version": read_brain_meta().get("model_version", 0) + 1,
+            "last_trained": time.time(),
+            "trained_count": len(trained_topics),
+            "class_count": len(clf.classes_),
+            "index_size": len(index),
+            "updates_since_rebuild": updates_since_rebuild,
+            "format": BRAIN_FORMAT
+        }
+        write_json(meta_file, brain_meta)
+        brain_meta_stamp = file_stamp(meta_file)
+        loaded_version = brain_meta["model_version"]
+
+def rebuild_brain():
+    """Refit the classifier from scratch on all current knowledge"""
+    global clf, trained_topics, updates_since_rebuild
+    X, y, questions = load_training_data()
 
     if len(X) < 2:
         print("⚠️ Need at least 2 data points to train the brain.")
         return False
 
     try:
-        # Train the classifier
-        clf.fit(X, y)
+        # Train a new classifier while the current one keeps answering
+        net = new_classifier()
+        net.fit(X, intern_answers(y))
+        sync_index(X, questions)
 
-        # Save the trained model
-        with open(model_file, 'wb') as f:
-            pickle.dump(clf, f)
+        with brain_lock:
+            clf = net
+            trained_topics = {q: answer_key(a) for q, a in zip(questions, y)}
+            updates_since_rebuild = 0
+        save_brain()
 
         print(f"🧠 Neural brain trained with {len(X)} knowledge points.")
         return True
@@ -61,77 +489,241 @@ def train_brain():
         print(f"❌ Brain training failed: {e}")
         return False
 
+def train_brain(full=False):
+    """Train the neural network brain with current knowledge
+
+    By default only topics learned since the last run are fed to the existing
+    model. A full rebuild happens on request, when no model exists yet, or once
+    `full_rebuild_every` incremental updates have accumulated.
+    """
+    with training_lock:
+        if sharded:
+            import sharded_brain
+            return sharded_brain.train_shards(full=full)
+        if not is_trained():
+            load_brain()
+
+        if full or not is_trained() or updates_since_rebuild >= full_rebuild_every:
+            return rebuild_brain()
+        return update_brain()
+
+def update_brain():
+    """Feed knowledge learned since the last run to a copy of the model, then swap it in"""
+    global clf, updates_since_rebuild
+    X_new, y_new, questions = load_training_data(skip=trained_topics)
+    if len(X_new) == 0:
+        print("🧠 Neural brain already up to date.")
+        return True
+
+    try:
+        X_old, y_old = replay_sample(read_topics(), replay_size)
+        X_fit = np.vstack([X_new, X_old])
+        net = training_copy(clf)
+        if not incremental_fit(net, X_fit, intern_answers(list(y_new) + y_old)):
+            print("🧠 Incremental update did not learn the new knowledge, rebuilding...")
+            return rebuild_brain()
+
+        sync_index(X_new, questions)
+        with brain_lock:
+            clf = net
+            for question, answer in zip(questions, y_new):
+                trained_topics[question] = answer_key(answer)
+            updates_since_rebuild += 1
+        save_brain()
+
+        print(f"🧠 Neural brain updated with {len(X_new)} new knowledge points.")
+        return True
+
+    except Exception as e:
+        print(f"❌ Brain training failed: {e}")
+        return False
+
 def load_brain():
     """Load pre-trained brain model if available"""
-    if os.path.exists(model_file):
+    global clf, trained_topics, updates_since_rebuild, loaded_version
+    if sharded:
+        import sharded_brain
+        return sharded_brain.load_shards()
+    if not snapshot_exists(snapshot_dir) and os.path.exists(model_file):
+        print(f"⚠️ Found a pickled {model_file}; convert it with: python brain_snapshot.py {model_file} {snapshot_dir}")
+    if snapshot_exists(snapshot_dir):
         try:
-            with open(model_file, 'rb') as f:
-                global clf
-                clf = pickle.load(f)
+            # Under the save lock, so model, training record and meta match
+            with snapshot_lock(snapshot_dir):
+                meta = read_brain_meta()
+                version = meta.get("model_version", 0)
+                net = load_snapshot(snapshot_dir)
+                try:
+                    with open(trained_file) as f:
+                        trained = json.load(f)
+                except (OSError, ValueError):
+                    meta = {}
+            updates = meta.get("updates_since_rebuild", 0)
+            if meta.get("format") != BRAIN_FORMAT:
+                # Unknown training set or an older model format: force the next run to rebuild
+                trained = {}
+                updates = full_rebuild_every
+            with brain_lock:
+                clf, trained_topics, updates_since_rebuild = net, trained, updates
+                loaded_version = version
             print("🧠 Pre-trained brain model loaded.")
             return True
         except Exception as e:
             print(f"⚠️ Failed to load brain model: {e}")
     return False
 
-def predict_answer(question):
-    """Predict answer using neural network and similarity matching"""
+def empty_result(question):
+    return {"question": question, "answer": None, "score": 0.0, "tier": None, "match": None}
+
+def predict_answers(questions):
+    """Answer a batch of questions in one pass
+
+    All questions are encoded together and scored with a single predict_proba
+    call; rows below the confidence threshold share one similarity search.
+    Returns one dict per question with the answer (or None), its score and the
+    tier that answered: "brain", "similarity", "lexical" or None for a miss.
+    """
+    questions = list(questions)
+    results = [empty_result(q) for q in questions]
+    if not questions:
+        return results
+
+    if not is_trained() or is_stale():
+        load_brain()
+    question_vecs = encode_texts(questions)
+    if sharded:
+        import sharded_brain
+        return lexical_tier(sharded_brain.predict_answers(questions, question_vecs, confidence_threshold, similarity_threshold))
+
+    # Neural network tier for every question at once (on one model even if
+    # a background training run swaps in a new one meanwhile)
+    net = clf
+    pending = list(range(len(questions)))
     try:
-        # Load brain if not already loaded
-        if not hasattr(clf, 'classes_'):
-            if not load_brain():
-                raise Exception("Brain not trained yet")
+        proba = net.predict_proba(question_vecs)
+        best = np.argmax(proba, axis=1)
+        confidence = proba[np.arange(len(questions)), best]
+        pending = []
+        for i in range(len(questions)):
+            results[i]["score"] = float(confidence[i])
+            # A class whose answer was dropped from the answer table falls through
+            answer = answer_text(int(net.classes_[best[i]])) if confidence[i] > confidence_threshold else None
+            if answer is not None:
+                results[i].update(answer=answer_of(answer), tier="brain")
+            else:
+                pending.append(i)
+    except Exception:
+        pass
 
-        # Get question embedding
-        question_vec = model.encode(question)
+    if not pending:
+        return results
 
-        # Try neural network prediction first
-        try:
-            predicted_answer = clf.predict([question_vec])[0]
-            confidence = max(clf.predict_proba([question_vec])[0])
-
-            # If confidence is high enough, return neural network prediction
-            if confidence > 0.3:
-                return predicted_answer
-        except:
-            pass
-
-        # Fallback to similarity-based matching
-        X, y, questions = load_training_data()
-        if len(X) == 0:
-            raise Exception("No training data available")
+    # Similarity tier: one nearest-neighbour search for all remaining rows
+    index = get_vector_index()
+    if len(index) == 0:
+        X, _, stored = load_training_data()
+        sync_index(X, stored)
+    with brain_lock:
+        matches = index.search_many(question_vecs[pending], k=1)
+    topics = None
+    for i, found in zip(pending, matches):
+        if not found:
+            continue
+        best_question, best_similarity = found[0]
+        results[i].update(score=best_similarity, match=best_question)
+        if best_similarity > similarity_threshold:
+            if topics is None:
+                topics = read_topics()
+            answer = topics.get(best_question)
+            if is_answer(answer):
+                results[i].update(answer=answer_of(answer), tier="similarity")
+    return lexical_tier(results)
+
+def lexical_tier(results):
+    """Keyword (BM25) tier for the questions both embedding tiers missed"""
+    topics = None
+    for result in results:
+        if result["tier"]:
+            continue
+        found = lexical_index.search(result["question"], k=1)
+        if found and found[0][1] >= lexical_threshold:
+            if topics is None:
+                topics = read_topics()
+            answer = topics.get(found[0][0])
+            if is_answer(answer):
+                result.update(answer=answer_of(answer), score=found[0][1], tier="lexical", match=found[0][0])
+    return results
 
-        # Calculate similarities
-        similarities = cosine_similarity([question_vec], X)[0]
-        best_match_idx = np.argmax(similarities)
-        best_similarity = similarities[best_match_idx]
+def model_version():
+    """Version of the saved brain; bumped on every save"""
+    if sharded:
+        import sharded_brain
+        return sharded_brain.model_version()
+    return read_brain_meta().get("model_version", 0)
+
+def predict_answer(question):
+    """Predict answer using neural network and similarity matching"""
+    return predict_answer_result(question)["answer"]
 
-        # Return best match if similarity is high enough
-        if best_similarity > 0.7:
-            print(f"🎯 Found similar question: '{questions[best_match_idx]}' (similarity: {best_similarity:.2f})")
-            return y[best_match_idx]
+def predict_answer_result(question):
+    """Like predict_answer, but returns the full predict_answers result dict"""
+    try:
+        # Load brain if not already loaded; without one only keywords can answer
+        if not is_trained() and not load_brain():
+            result = lexical_tier([empty_result(question)])[0]
+            if not result["tier"]:
+                raise Exception("Brain not trained yet")
+        else:
+            result = predict_answers([question])[0]
+        if result["tier"] == "similarity":
+            print(f"🎯 Found similar question: '{result['match']}' (similarity: {result['score']:.2f})")
+        elif result["tier"] == "lexical":
+            print(f"🔎 Found keyword match: '{result['match']}' (score: {result['score']:.2f})")
+        if result["tier"]:
+            return result
 
         # If no good match found, raise exception to trigger search
-        raise Exception(f"No similar question found (best similarity: {best_similarity:.2f})")
+        if result["match"] is None:
+            raise Exception("No training data available")
+        raise Exception(f"No similar question found (best similarity: {result['score']:.2f})")
 
     except Exception as e:
         print(f"🤔 Brain prediction failed: {e}")
         raise e
 
 def get_brain_stats():
-    """Get statistics about the brain's knowledge"""
+    """Get statistics about the brain's knowledge
+
+    Built only from stored counters and brain metadata, so it is a constant-time
+    lookup that never reads the whole knowledge base or touches the encoder.
+    """
     try:
-        X, y, _ = load_training_data()
+        memory = memory_stats()
+        if sharded:
+            import sharded_brain
+            meta = sharded_brain.read_shard_meta()
+            model_exists = bool(meta)
+            index_size = sharded_brain.index_size()
+        else:
+            meta = read_brain_meta()
+            model_exists = snapshot_exists(snapshot_dir)
+            index_size = len(vector_index) if vector_index is not None else meta.get("index_size", 0)
         return {
-            "total_knowledge": len(X),
-            "unique_answers": len(set(y)),
-            "is_trained": hasattr(clf, 'classes_'),
-            "model_exists": os.path.exists(model_file)
+            "total_knowledge": memory["knowledge"],
+            "unique_answers": memory["unique_answers"],
+            "is_trained": is_trained() or model_exists,
+            "model_exists": model_exists,
+            "last_trained": meta.get("last_trained"),
+            "model_version": meta.get("model_version", 0),
+            "index_size": index_size
         }
     except:
         return {
             "total_knowledge": 0,
             "unique_answers": 0,
             "is_trained": False,
-            "model_exists": False
+            "model_exists": False,
+            "last_trained": None,
+            "model_version": 0,
+            "index_size": 0
         }
@@ -6,6 +6,7 @@ Run this script to start the real AI system
 
 import sys
 import os
+import importlib.util
 
 def check_dependencies():
     """Check if all required dependencies are installed"""
@@ -22,11 +23,10 @@ def check_dependencies():
         ('re', 're')
     ]
 
+    # Only locate the packages; importing torch here would defeat lazy loading
     missing_packages = []
     for import_name, package_name in required_imports:
-        try:
-            __import__(import_name)
-        except ImportError:
+        if importlib.util.find_spec(import_name) is None:
             missing_packages.append(package_name)
 
     if missing_packages:
@@ -103,18 +103,18 @@ def main():
             
             # Show current knowledge base
             try:
-                from shared_memory import load_memory
+                from shared_memory import iter_topics, memory_stats
                 from nn_brain import get_brain_stats
                 
-                memory = load_memory()
+                topic_count = memory_stats()['topics']
                 stats = get_brain_stats()
                 
-                print(f"\n📚 Current Knowledge Base: {len(memory['topics'])} topics")
+                print(f"\n📚 Current Knowledge Base: {topic_count} topics")
                 print(f"🧠 Brain Status: {stats}")
                 
-                if memory['topics']:
+                if topic_count:
                     print("\n📋 Recent Knowledge:")
-                    for i, (q, a) in enumerate(list(memory['topics'].items())[-3:], 1):
+                    for i, (q, a) in enumerate(iter_topics(limit=3, newest_first=True), 1):
                         print(f"   {i}. Q: {q}")
                         print(f"      A: {a[:80]}{'...' if len(a) > 80 else ''}")
                         
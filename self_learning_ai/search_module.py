@@ -1,32 +1,135 @@
 import requests
 from bs4 import BeautifulSoup
+import os
 import time
 import random
+import threading
 import urllib.parse
-
-def search_web(query):
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# How search_web runs its strategies:
+#   "first"      all at once; the first good result wins, the rest are cancelled
+#   "best"       all at once; wait for best_of good results (or best_of_deadline
+#                seconds once one is in) and keep the most preferred strategy's
+#   "sequential" one after another, as before
+search_mode = os.environ.get("SEARCH_MODE", "first")
+best_of = 2
+best_of_deadline = 5.0
+
+# Shared by all searches; sized so providers still stuck on a timeout from
+# earlier questions do not hold up new ones
+search_pool = ThreadPoolExecutor(max_workers=12, thread_name_prefix="search")
+
+# Cancel event of the search the current pool thread is working for
+search_state = threading.local()
+
+class SearchCancelled(Exception):
+    """Raised inside a strategy once another strategy already answered"""
+
+def search_cancelled():
+    event = getattr(search_state, "cancel", None)
+    return event is not None and event.is_set()
+
+def http_get(url, **kwargs):
+    """requests.get that is skipped once the search it belongs to has been decided"""
+    if search_cancelled():
+        raise SearchCancelled()
+    return requests.get(url, **kwargs)
+
+def pause(seconds):
+    """time.sleep that ends early when the search it belongs to has been decided"""
+    event = getattr(search_state, "cancel", None)
+    if event is None:
+        time.sleep(seconds)
+    elif event.wait(seconds):
+        raise SearchCancelled()
+
+def good_result(result):
+    return bool(result) and result != "No result found." and len(result) > 20
+
+def search_web(query, mode=None):
     """Enhanced web search with multiple strategies and better parsing"""
     print(f"🌐 Searching: {query}")
 
-    # Try multiple search strategies
+    # Search strategies, most preferred first
     strategies = [
         search_duckduckgo,
         search_wikipedia,
         search_google_fallback
     ]
 
+    mode = mode or search_mode
+    if mode == "sequential":
+        result = search_sequential(query, strategies)
+    else:
+        result = search_concurrent(query, strategies, best_of if mode == "best" else 1)
+    if result is not None:
+        return result
+
+    # If all strategies fail, return a more informative message
+    return f"Unable to find detailed information about '{query}'. This topic may require specialized knowledge or the search services are currently unavailable."
+
+def search_sequential(query, strategies):
     for strategy in strategies:
         try:
             result = strategy(query)
-            if result and result != "No result found." and len(result) > 20:
+            if good_result(result):
                 print(f"✅ Found result using {strategy.__name__}")
                 return result
         except Exception as e:
             print(f"⚠️ {strategy.__name__} failed: {e}")
             continue
+    return None
 
-    # If all strategies fail, return a more informative message
-    return f"Unable to find detailed information about '{query}'. This topic may require specialized knowledge or the search services are currently unavailable."
+def run_strategy(strategy, query, cancel):
+    search_state.cancel = cancel
+    try:
+        return strategy(query)
+    finally:
+        search_state.cancel = None
+
+def search_concurrent(query, strategies, wanted=1, deadline=None):
+    """Run every strategy at once and return as soon as `wanted` good results are in
+
+    With wanted > 1 the search stops waiting `deadline` seconds (default
+    best_of_deadline) after it started, as long as one good result is in. Of
+    the good results, the one from the earliest strategy in the list wins.
+    Strategies still running are cancelled before their next request.
+    """
+    if deadline is None:
+        deadline = best_of_deadline
+    cancel = threading.Event()
+    futures = {search_pool.submit(run_strategy, strategy, query, cancel): strategy for strategy in strategies}
+    pending = set(futures)
+    found = {}
+    started = time.monotonic()
+    try:
+        while pending and len(found) < wanted:
+            timeout = None
+            if found:
+                timeout = max(0.0, started + deadline - time.monotonic())
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # deadline passed with a good result in hand
+            for future in done:
+                strategy = futures[future]
+                try:
+                    result = future.result()
+                except SearchCancelled:
+                    continue
+                except Exception as e:
+                    print(f"⚠️ {strategy.__name__} failed: {e}")
+                    continue
+                if good_result(result):
+                    found[strategy] = result
+    finally:
+        cancel.set()
+
+    for strategy in strategies:
+        if strategy in found:
+            print(f"✅ Found result using {strategy.__name__} ({time.monotonic() - started:.1f}s)")
+            return found[strategy]
+    return None
 
 def search_duckduckgo(query):
     """Search using DuckDuckGo (more bot-friendly)"""
@@ -37,7 +140,7 @@ def search_duckduckgo(query):
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    response = requests.get(url, headers=headers, timeout=10)
+    response = http_get(url, headers=headers, timeout=10)
     soup = BeautifulSoup(response.text, "html.parser")
 
     # Try different selectors for DuckDuckGo results
@@ -67,7 +170,7 @@ def search_wikipedia(query):
             "User-Agent": "SelfLearningAI/1.0 (Educational Purpose)"
         }
 
-        response = requests.get(search_url, headers=headers, timeout=10)
+        response = http_get(search_url, headers=headers, timeout=10)
 
         if response.status_code == 200:
             data = response.json()
@@ -84,19 +187,21 @@ def search_wikipedia(query):
             "srlimit": 1
         }
 
-        response = requests.get(search_api_url, params=params, headers=headers, timeout=10)
+        response = http_get(search_api_url, params=params, headers=headers, timeout=10)
         data = response.json()
 
         if 'query' in data and 'search' in data['query'] and data['query']['search']:
             page_title = data['query']['search'][0]['title']
             summary_url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{urllib.parse.quote(page_title)}"
 
-            summary_response = requests.get(summary_url, headers=headers, timeout=10)
+            summary_response = http_get(summary_url, headers=headers, timeout=10)
             if summary_response.status_code == 200:
                 summary_data = summary_response.json()
                 if 'extract' in summary_data:
                     return summary_data['extract']
 
+    except SearchCancelled:
+        raise
     except Exception as e:
         print(f"Wikipedia search error: {e}")
 
@@ -116,9 +221,9 @@ def search_google_fallback(query):
     }
 
     # Add random delay to avoid rate limiting
-    time.sleep(random.uniform(1, 3))
+    pause(random.uniform(1, 3))
 
-    response = requests.get(url, headers=headers, timeout=15)
+    response = http_get(url, headers=headers, timeout=15)
     soup = BeautifulSoup(response.text, "html.parser")
 
     # Try multiple selectors for Google results
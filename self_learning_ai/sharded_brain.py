@@ -0,0 +1,332 @@
+"""
+Category-sharded brain
+Instead of one classifier holding every answer, knowledge is split into one
+shard per topic category (the categories of RandomQuestionGenerator). Each
+shard has its own small classifier snapshot and vector index under
+brain_shards/<category>/.
+
+A router embeds each category's subjects once and sends a question to the
+shards whose centroid is closest. Training refits only the shards whose
+topics changed, in parallel in a process pool, so a new fact costs one small
+shard refit and a full rebuild uses every core.
+
+Enable it with BRAIN_SHARDS=1; nn_brain then delegates training, loading and
+prediction here.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+from vector_index import VectorIndex, normalise
+from brain_snapshot import save_snapshot, load_snapshot, snapshot_exists, MANIFEST
+from shared_memory import intern_answers, answer_text, write_json
+from cold_answers import answer_key, answer_of, is_answer, is_knowledge
+
+shards_dir = "brain_shards"
+router_file = os.path.join(shards_dir, "router.npz")
+trained_file = os.path.join(shards_dir, "trained.json")
+meta_file = os.path.join(shards_dir, "meta.json")
+
+# Shards consulted per question when answering
+probe_shards = 2
+
+# Worker processes for training (defaults to every core)
+max_workers = None
+
+router = None      # (names, centroids)
+shards = None      # name -> {"net": classifier or None, "index": VectorIndex}
+trained = {}       # topic -> [shard, answer digest]
+shard_meta = None
+shard_meta_stamp = None
+loaded_version = None  # model_version of the shards loaded in this process
+
+
+def shard_path(name):
+    return os.path.join(shards_dir, name)
+
+
+def category_texts():
+    """Category name -> descriptive texts (its subjects) used to place it in embedding space"""
+    from random_question_generator import RandomQuestionGenerator
+    categories = RandomQuestionGenerator().categories
+    return {name: [name] + subjects for name, subjects in categories.items()}
+
+
+def get_router():
+    """Category names and their unit-length centroids, built once and saved"""
+    global router
+    if router is None:
+        from nn_brain import encode_texts, model_name
+        try:
+            saved = np.load(router_file)
+            if str(saved["model"]) != model_name:
+                raise ValueError("router was built with another encoder")
+            router = (saved["names"].tolist(), saved["centroids"])
+        except (OSError, KeyError, ValueError):
+            texts = category_texts()
+            names = sorted(texts)
+            centroids = normalise([encode_texts(texts[name]).mean(axis=0) for name in names])
+            os.makedirs(shards_dir, exist_ok=True)
+            np.savez(router_file, model=model_name, names=np.array(names), centroids=centroids)
+            router = (names, centroids)
+    return router
+
+
+def route(vecs, top=1):
+    """Best `top` shard names for each question vector"""
+    names, centroids = get_router()
+    order = np.argsort(-(normalise(vecs) @ centroids.T), axis=1)[:, :top]
+    return [[names[i] for i in row] for row in order]
+
+
+def read_shard_meta():
+    global shard_meta, shard_meta_stamp
+    from nn_brain import file_stamp
+    stamp = file_stamp(meta_file)
+    if shard_meta is None or stamp != shard_meta_stamp:
+        try:
+            with open(meta_file) as f:
+                shard_meta = json.load(f)
+        except (OSError, ValueError):
+            shard_meta = {}
+        shard_meta_stamp = stamp
+    return shard_meta
+
+
+def model_version():
+    return read_shard_meta().get("model_version", 0)
+
+
+def load_shard(name):
+    directory = shard_path(name)
+    net = None
+    if snapshot_exists(directory):
+        try:
+            net = load_snapshot(directory)
+        except Exception as e:
+            print(f"⚠️ Failed to load brain shard {name}: {e}")
+    return {"net": net, "index": VectorIndex(os.path.join(directory, "index.npy"))}
+
+
+def load_shards():
+    """Open every saved shard; returns False if there is nothing to load"""
+    global shards, trained, loaded_version
+    if not os.path.exists(meta_file):
+        return False
+    version = model_version()
+    names, _ = get_router()
+    loaded = {name: load_shard(name) for name in names}
+    try:
+        with open(trained_file) as f:
+            known = json.load(f)
+    except (OSError, ValueError):
+        known = {}
+    from nn_brain import brain_lock
+    with brain_lock:
+        shards, trained, loaded_version = loaded, known, version
+    print(f"🧠 Sharded brain loaded ({sum(1 for s in loaded.values() if s['net'] is not None)} trained shards).")
+    return True
+
+
+def is_trained():
+    return shards is not None and any(s["net"] is not None for s in shards.values())
+
+
+def is_stale():
+    return loaded_version is not None and loaded_version != model_version()
+
+
+def index_topics(questions, vecs):
+    """Make newly saved questions searchable in the index of their home shard"""
+    global shards
+    from nn_brain import brain_lock
+    names, _ = get_router()
+    if shards is None and not load_shards():
+        # Nothing trained yet: start the shard indexes on their own
+        with brain_lock:
+            shards = {name: load_shard(name) for name in names}
+    members = {}
+    for i, home in enumerate(route(vecs)):
+        members.setdefault(home[0], []).append(i)
+    with brain_lock:
+        for name, rows in members.items():
+            os.makedirs(shard_path(name), exist_ok=True)
+            shards[name]["index"].add_many([questions[i] for i in rows], vecs[rows])
+
+
+def index_size():
+    """Questions in every shard index (saved sizes until the shards are loaded)"""
+    if shards is not None:
+        return sum(len(shard["index"]) for shard in shards.values())
+    return sum(read_shard_meta().get("shard_sizes", {}).values())
+
+
+def fit_shard(name, questions, X, y):
+    """Process-pool job: refit one shard's classifier and rebuild its index"""
+    from nn_brain import new_classifier
+    directory = shard_path(name)
+    os.makedirs(directory, exist_ok=True)
+
+    index = VectorIndex(os.path.join(directory, "index.npy"))
+    index.clear()
+    index.add_many(questions, X)
+    index.flush()
+
+    if len(set(y)) >= 2:
+        net = new_classifier()
+        net.fit(X, y)
+        save_snapshot(net, directory)
+    elif snapshot_exists(directory):
+        # Too few answers left for a classifier; the index still answers
+        os.remove(os.path.join(directory, MANIFEST))
+    return name, len(y)
+
+
+def train_shards(full=False):
+    """Refit the shards whose topics changed since the last run, in parallel"""
+    global shards, trained, shard_meta, shard_meta_stamp, loaded_version
+    from nn_brain import read_topics, embed_topics, get_embedding_store, brain_lock
+    if shards is None:
+        load_shards()
+
+    questions, answers = [], []
+    for topic, answer in read_topics().items():
+        if is_knowledge(topic, answer):
+            questions.append(topic)
+            answers.append(answer)
+    if len(questions) < 2:
+        print("⚠️ Need at least 2 data points to train the brain.")
+        return False
+
+    X = embed_topics(questions)
+    with brain_lock:
+        get_embedding_store().flush()
+    ids = intern_answers(answers)
+    homes = [names[0] for names in route(X)]
+
+    members = {}
+    for i, name in enumerate(homes):
+        members.setdefault(name, []).append(i)
+
+    current = {q: [home, answer_key(a)] for q, home, a in zip(questions, homes, answers)}
+    if full:
+        changed = set(members)
+    else:
+        changed = {home for q, (home, digest) in current.items() if trained.get(q) != [home, digest]}
+        changed |= {home for q, (home, _) in trained.items() if q not in current}
+    if not changed:
+        print("🧠 Neural brain already up to date.")
+        return True
+
+    started = time.time()
+    jobs = []
+    for name in sorted(changed):
+        rows = members.get(name, [])
+        jobs.append((name, [questions[i] for i in rows], X[rows], [ids[i] for i in rows]))
+
+    try:
+        context = multiprocessing.get_context("spawn")
+        workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            done = list(pool.map(fit_shard, *zip(*jobs)))
+    except Exception as e:
+        print(f"❌ Brain training failed: {e}")
+        return False
+
+    names, _ = get_router()
+    reloaded = {name: load_shard(name) for name, _ in done}
+    with brain_lock:
+        shards = {name: (shards or {}).get(name) or load_shard(name) for name in names}
+        shards.update(reloaded)
+        trained = current
+
+    write_json(trained_file, trained)
+    shard_meta = {
+        "model_version": read_shard_meta().get("model_version", 0) + 1,
+        "last_trained": time.time(),
+        "trained_count": len(trained),
+        "shard_sizes": {name: len(rows) for name, rows in members.items()}
+    }
+    write_json(meta_file, shard_meta)
+    from nn_brain import file_stamp
+    shard_meta_stamp = file_stamp(meta_file)
+    loaded_version = shard_meta["model_version"]
+
+    refitted = sum(count for _, count in done)
+    print(f"🧠 Sharded brain retrained {len(done)} shard(s) ({refitted} knowledge points) in {time.time() - started:.1f}s.")
+    return True
+
+
+def nearest(question_vecs):
+    """(closest stored question, similarity) for each row, searching the shards it routes to"""
+    best = [(None, -1.0)] * len(question_vecs)
+    if shards is None and not load_shards():
+        return best
+    current = shards
+    by_shard = {}
+    for i, names in enumerate(route(question_vecs, top=probe_shards)):
+        for name in names:
+            by_shard.setdefault(name, []).append(i)
+    for name, rows in by_shard.items():
+        shard = current.get(name)
+        if shard is None or not len(shard["index"]):
+            continue
+        for row, found in zip(rows, shard["index"].search_many(question_vecs[rows], k=1)):
+            if found and found[0][1] > best[row][1]:
+                best[row] = found[0]
+    return best
+
+
+def predict_answers(questions, question_vecs, confidence_threshold, similarity_threshold):
+    """Sharded counterpart of nn_brain.predict_answers (same result dicts, plus "shard")"""
+    results = [{"question": q, "answer": None, "score": 0.0, "tier": None, "match": None, "shard": None}
+               for q in questions]
+    if shards is None and not load_shards():
+        return results
+    current = shards
+    routes = route(question_vecs, top=probe_shards)
+
+    # Group rows by shard so each shard runs one predict_proba and one search
+    by_shard = {}
+    for i, names in enumerate(routes):
+        for name in names:
+            by_shard.setdefault(name, []).append(i)
+
+    best_similar = {}
+    for name, rows in by_shard.items():
+        shard = current.get(name)
+        if shard is None:
+            continue
+        vecs = question_vecs[rows]
+        if shard["net"] is not None:
+            net = shard["net"]
+            proba = net.predict_proba(vecs)
+            best = np.argmax(proba, axis=1)
+            for row, cls, confidence in zip(rows, best, proba[np.arange(len(rows)), best]):
+                if confidence > confidence_threshold and confidence > results[row]["score"]:
+                    answer = answer_text(int(net.classes_[cls]))
+                    if answer is not None:
+                        results[row].update(answer=answer_of(answer), score=float(confidence), tier="brain", shard=name)
+        if len(shard["index"]):
+            for row, found in zip(rows, shard["index"].search_many(vecs, k=1)):
+                if found and found[0][1] > best_similar.get(row, (None, -1.0, None))[1]:
+                    best_similar[row] = (found[0][0], found[0][1], name)
+
+    topics = None
+    for row, (match, similarity, name) in best_similar.items():
+        result = results[row]
+        if result["tier"]:
+            continue
+        result.update(score=similarity, match=match)
+        if similarity > similarity_threshold:
+            if topics is None:
+                from nn_brain import read_topics
+                topics = read_topics()
+            answer = topics.get(match)
+            if is_answer(answer):
+                result.update(answer=answer_of(answer), tier="similarity", shard=name)
+    return results
+
@@ -1,11 +1,455 @@
+import copy
 import json
+import os
+from itertools import islice
+import cold_answers
+from cold_answers import answer_key, is_cold, is_answer, is_knowledge, record_access
+from file_lock import FileLock
 
-def load_memory():
-    with open("shared_memory.json", "r") as f:
-        return json.load(f)
+memory_file = "shared_memory.json"
+stats_file = "shared_memory_stats.json"
 
-def save_memory(question, answer):
-    data = load_memory()
+# Held by every process while it changes memory_file or the answer table
+memory_lock = FileLock("shared_memory.lock")
+
+# Alternative knowledge base backends, each used instead of memory_file once
+# its file exists: SQLite (memory_db.py) or an append-only journal
+# (memory_journal.py)
+db_file = "shared_memory.db"
+journal_file = "shared_memory_journal.jsonl"
+memory_store = None
+
+# Parsed knowledge base and the memory_version() it was read at; reused until
+# any process changes the knowledge base, and kept current by our own writes
+memory_cache = None
+memory_cache_version = None
+
+# Answer table: every distinct answer text gets a small integer ID, which is
+# what the brain predicts. The SQLite and journal stores keep it themselves;
+# the JSON backend uses answers_file, one answer per line (the ID is the line
+# number, "null" once the answer is dropped). Only offsets and digests are
+# kept in memory; the text of an answer is read when it is actually needed.
+answers_file = "shared_memory_answers.jsonl"
+answer_offsets = None   # answer id -> byte offset of its line
+answer_ids = None       # answer digest -> answer id
+answers_end = 0         # bytes of answers_file already indexed
+answers_inode = None    # answers_file is rewritten (new inode) by archive_answers
+
+# Callbacks run after every save_memory(question, answer)
+save_hooks = []
+
+# Callbacks run once after save_memories(pairs) with (questions, answers)
+bulk_save_hooks = []
+
+# Optional callback mapping a new question to a stored near-duplicate of it
+duplicate_finder = None
+
+def add_save_hook(hook):
+    save_hooks.append(hook)
+
+def add_bulk_save_hook(hook):
+    bulk_save_hooks.append(hook)
+
+def set_duplicate_finder(finder):
+    global duplicate_finder
+    duplicate_finder = finder
+
+def get_memory_store():
+    """The SQLite or journal knowledge base, or None while the JSON file is still in use"""
+    global memory_store
+    if memory_store is None:
+        if os.path.exists(db_file):
+            from memory_db import MemoryDB
+            memory_store = MemoryDB(db_file)
+        elif os.path.exists(journal_file):
+            from memory_journal import MemoryJournal
+            memory_store = MemoryJournal(journal_file)
+        if memory_store is not None:
+            import_answer_file(memory_store)
+    return memory_store
+
+def import_answer_file(store):
+    """Move the JSON backend's answers_file into a store without an answer table, keeping IDs"""
+    if not os.path.exists(answers_file):
+        return
+    with store.exclusive():
+        if not os.path.exists(answers_file) or store.answer_count():
+            return
+        rows = []
+        with open(answers_file, "rb") as f:
+            for answer_id, line in enumerate(f):
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    value = json.loads(line)
+                except ValueError:
+                    continue
+                if value is not None:
+                    rows.append((answer_id, answer_key(value), value))
+        store.add_answers(rows)
+        os.replace(answers_file, answers_file + ".imported")
+    print(f"📦 Moved {len(rows)} answers from {answers_file} into the knowledge store.")
+
+def copy_memory(data):
+    """Copy of a knowledge base dict that can be changed without touching the original"""
+    return {key: dict(value) if isinstance(value, dict) else copy.deepcopy(value) for key, value in data.items()}
+
+def cached_memory():
+    """The knowledge base, parsed only when it changed since the last read
+
+    The returned dict is shared: treat it as read-only (load_memory() gives
+    a private copy).
+    """
+    global memory_cache, memory_cache_version
+    version = memory_version()
+    if memory_cache is None or version != memory_cache_version:
+        store = get_memory_store()
+        if store is not None:
+            data = store.load()
+        else:
+            with open(memory_file, "r") as f:
+                data = json.load(f)
+        memory_cache, memory_cache_version = data, version
+    return memory_cache
+
+def remember_memory(data, version):
+    """Write-through: make data (already saved at version) the cached copy"""
+    global memory_cache, memory_cache_version
+    memory_cache, memory_cache_version = data, version
+
+def load_memory(hydrate=True):
+    """A private copy of the knowledge base
+
+    Cold answers come back as plain text unless hydrate=False, which keeps
+    their short references (for passes that write the data back).
+    """
+    data = copy_memory(cached_memory())
+    if hydrate:
+        topics = data["topics"]
+        for topic, answer in topics.items():
+            if is_cold(answer):
+                topics[topic] = cold_answers.hydrate(answer)
+    return data
+
+def select_topics(topics, offset=0, limit=None, newest_first=False, prefix=None):
+    """Questions of a topics dict for one page, in insertion order (or newest first)"""
+    questions = reversed(topics) if newest_first else iter(topics)
+    if prefix:
+        questions = (question for question in questions if question.startswith(prefix))
+    return islice(questions, offset, None if limit is None else offset + limit)
+
+def iter_topics(offset=0, limit=None, newest_first=False, prefix=None, hydrate=True):
+    """Yield stored (question, answer) pairs one page at a time
+
+    Skips `offset` topics, stops after `limit`, and optionally keeps only
+    questions starting with `prefix`. The SQLite and journal stores stream
+    from disk; the JSON file is walked in its cached parse, never copied.
+    Only the answers yielded are decompressed.
+    """
+    store = get_memory_store()
+    if store is not None:
+        pairs = store.iter_topics(offset, limit, newest_first, prefix)
+    else:
+        topics = cached_memory()["topics"]
+        pairs = ((question, topics[question]) for question in select_topics(topics, offset, limit, newest_first, prefix))
+    for question, answer in pairs:
+        yield question, cold_answers.hydrate(answer) if hydrate else answer
+
+def count_topics(topics):
+    """Counters describing a topic -> answer mapping"""
+    answers = [answer for topic, answer in topics.items() if is_knowledge(topic, answer)]
+    return {
+        "topics": len(topics),
+        "knowledge": len(answers),
+        "unique_answers": len(set(map(answer_key, answers)))
+    }
+
+def write_json(path, data, **kwargs):
+    """Write a JSON file atomically: a reader sees the old or the new file, never half of one"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def write_stats(stats):
+    write_json(stats_file, stats)
+
+def memory_stats():
+    """Topic and answer counters without parsing the knowledge base
+
+    The counters are written next to shared_memory.json on every save; they
+    are only recomputed if the knowledge base was changed behind our back.
+    """
+    store = get_memory_store()
+    if store is not None:
+        return store.stats()
+    try:
+        if os.path.getmtime(stats_file) >= os.path.getmtime(memory_file):
+            with open(stats_file) as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass
+    stats = count_topics(cached_memory()["topics"])
+    write_stats(stats)
+    return stats
+
+def load_answer_table():
+    """Index any answers_file lines we have not seen yet (another process may have appended)"""
+    global answer_offsets, answer_ids, answers_end, answers_inode
+    try:
+        st = os.stat(answers_file)
+    except OSError:
+        st = None
+    inode = st.st_ino if st else None
+    if answer_offsets is None or inode != answers_inode:
+        answer_offsets, answer_ids, answers_end, answers_inode = [], {}, 0, inode
+    if st is None or st.st_size == answers_end:
+        return
+    with open(answers_file, "rb") as f:
+        f.seek(answers_end)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # half-written line, picked up once it is complete
+            try:
+                value = json.loads(line)
+                if value is not None:
+                    answer_ids[answer_key(value)] = len(answer_offsets)
+            except ValueError:
+                pass  # damaged line: keep its ID slot so later IDs stay stable
+            answer_offsets.append(answers_end)
+            answers_end += len(line)
+
+def intern_answers(answers):
+    """Integer IDs for answer texts (or cold references), adding unseen ones to the answer table"""
+    keys = [answer_key(answer) for answer in answers]
+    store = get_memory_store()
+    if store is not None:
+        ids = store.answer_ids(keys)
+        if None in ids:
+            new = {}
+            for key, answer, answer_id in zip(keys, answers, ids):
+                if answer_id is None:
+                    new.setdefault(key, answer)
+            store.add_answers([(None, key, answer) for key, answer in new.items()])
+            ids = store.answer_ids(keys)
+        return ids
+
+    load_answer_table()
+    if any(key not in answer_ids for key in keys):
+        with memory_lock:
+            # Another process may have added some of them meanwhile
+            load_answer_table()
+            new = {}
+            for key, answer in zip(keys, answers):
+                if key not in answer_ids and key not in new:
+                    new[key] = answer
+            if new:
+                with open(answers_file, "ab") as f:
+                    for key, answer in new.items():
+                        f.write((json.dumps(answer) + "\n").encode("utf-8"))
+                load_answer_table()
+    return [answer_ids[key] for key in keys]
+
+def answer_text(answer_id):
+    """Text of an interned answer, or None if it was dropped from the answer table"""
+    store = get_memory_store()
+    if store is not None:
+        value = store.answer_value(answer_id)
+    else:
+        load_answer_table()
+        if answer_id >= len(answer_offsets):
+            return None
+        with open(answers_file, "rb") as f:
+            f.seek(answer_offsets[answer_id])
+            value = json.loads(f.readline())
+    return None if value is None else cold_answers.hydrate(value)
+
+def rewrite_answer_table():
+    """Compact the answer table: each answer in the tier its topics hold it in, unused ones dropped
+
+    IDs stay the same; a model still predicting a dropped answer gets None from
+    answer_text() and the question falls through to the next tier. Returns the
+    number of answers dropped.
+    """
+    store = get_memory_store()
+    if store is not None:
+        return store.rewrite_answers()
+    with memory_lock:
+        if not os.path.exists(answers_file):
+            return 0
+        values = {}
+        for question, answer in cached_memory()["topics"].items():
+            if is_knowledge(question, answer):
+                values[answer_key(answer)] = answer
+        dropped = 0
+        tmp_path = f"{answers_file}.{os.getpid()}.tmp"
+        with open(answers_file, "rb") as src, open(tmp_path, "wb") as dst:
+            for line in src:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    value = json.loads(line)
+                except ValueError:
+                    dst.write(line)
+                    continue
+                if value is not None:
+                    value = values.get(answer_key(value))
+                    dropped += value is None
+                dst.write((json.dumps(value) + "\n").encode("utf-8"))
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, answers_file)
+        load_answer_table()
+    return dropped
+
+def archive_answers():
+    """Move long answers nobody read lately to the compressed cold tier (and hot ones back)
+
+    Returns (answers frozen, answers thawed).
+    """
+    for attempt in range(3):
+        version = memory_version()
+        data = load_memory(hydrate=False)
+        frozen, thawed = cold_answers.retier(data["topics"])
+        if not (frozen or thawed) or write_memory(data, expected_version=version):
+            break
+        print("⚠️ Knowledge base changed during archiving, retrying...")
+    else:
+        print("❌ Knowledge base kept changing; archiving skipped.")
+        return 0, 0
+
+    dropped = rewrite_answer_table()
+    store = get_memory_store()
+    if store is not None and (frozen or thawed or dropped):
+        store.compact()
+    cold_answers.flush_access(reset_reads=True)
+    print(f"🧊 Moved {frozen} answers to the cold tier and {thawed} back to the hot tier; "
+          f"dropped {dropped} replaced answers from the answer table.")
+    return frozen, thawed
+
+def memory_version():
+    """Token that changes whenever any process changes the knowledge base"""
+    store = get_memory_store()
+    if store is not None:
+        return store.version()
+    st = os.stat(memory_file)
+    return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+def write_memory(data, expected_version=None):
+    """Replace the whole knowledge base
+
+    With expected_version (from memory_version() when data was loaded) the
+    write only happens if nobody changed the knowledge base since; returns
+    False if someone did, so the caller can reload and try again.
+    """
+    store = get_memory_store()
+    if store is not None:
+        with store.exclusive():
+            if expected_version is not None and store.version() != expected_version:
+                return False
+            store.replace(data)
+            remember_memory(copy_memory(data), store.version())
+        return True
+    with memory_lock:
+        if expected_version is not None and memory_version() != expected_version:
+            return False
+        write_json(memory_file, data, indent=4)
+        write_stats(count_topics(data["topics"]))
+        remember_memory(copy_memory(data), memory_version())
+    return True
+
+def resolve_question(data, question, find_duplicates=True):
+    """The stored question a new one should be filed under (itself if it is new)"""
+    topics = data["topics"]
+    if question in topics:
+        return question
+    canonical = data.get("aliases", {}).get(question)
+    if canonical is None and find_duplicates and duplicate_finder is not None:
+        canonical = duplicate_finder(question)
+    return canonical if canonical in topics else question
+
+def file_answer(data, question, canonical, answer):
+    """Store answer under canonical, recording question as its alias; returns (question, answer) stored"""
+    if canonical != question:
+        data.setdefault("aliases", {})[question] = canonical
+        # The stored answer wins unless it is a failed search
+        existing = data["topics"].get(canonical)
+        if is_answer(existing):
+            answer = existing
+        question = canonical
     data["topics"][question] = answer
-    with open("shared_memory.json", "w") as f:
-        json.dump(data, f, indent=4)
+    return question, answer
+
+def save_memory(question, answer):
+    """Store an answer; near-duplicates of a stored question become aliases of it
+
+    Returns the question the answer was filed under.
+    """
+    store = get_memory_store()
+    if store is not None:
+        # Indexed lookups, then one small write transaction
+        data = store.view()
+        canonical = resolve_question(data, question)
+        with store.exclusive(), store.transaction():
+            saved = file_answer(data, question, canonical, answer)
+        # The new store version invalidates the cached copy; it is re-read on
+        # its next use rather than copied here, which would make saves O(N)
+        question, answer = saved
+    else:
+        # Look for a duplicate without holding the lock, then re-read and
+        # write under it so concurrent savers never lose each other's facts
+        canonical = resolve_question(cached_memory(), question)
+        with memory_lock:
+            data = load_memory(hydrate=False)
+            if canonical not in data["topics"]:
+                canonical = question
+            question, answer = file_answer(data, question, canonical, answer)
+            write_json(memory_file, data, indent=4)
+            write_stats(count_topics(data["topics"]))
+            remember_memory(data, memory_version())
+    if is_answer(answer):
+        intern_answers([answer])
+        record_access(answer_key(answer))
+    for hook in save_hooks:
+        hook(question, answer)
+    return question
+
+def save_memories(pairs):
+    """Store many (question, answer) pairs in one transaction
+
+    The whole batch is one write: a single rewrite of shared_memory.json, one
+    SQLite transaction or one journal append. Known aliases are followed but
+    there is no per-question near-duplicate search (run consolidate_memory
+    afterwards if the data may contain paraphrases). Bulk save hooks run once
+    for the whole batch. Returns the questions the answers were filed under.
+    """
+    store = get_memory_store()
+    saved = {}
+    if store is not None:
+        data = store.view()
+        with store.exclusive(), store.transaction():
+            for question, answer in pairs:
+                canonical = resolve_question(data, question, find_duplicates=False)
+                question, answer = file_answer(data, question, canonical, answer)
+                saved[question] = answer
+    else:
+        with memory_lock:
+            data = load_memory(hydrate=False)
+            for question, answer in pairs:
+                canonical = resolve_question(data, question, find_duplicates=False)
+                question, answer = file_answer(data, question, canonical, answer)
+                saved[question] = answer
+            write_json(memory_file, data, indent=4)
+            write_stats(count_topics(data["topics"]))
+            remember_memory(data, memory_version())
+
+    valid = [answer for answer in saved.values() if is_answer(answer)]
+    intern_answers(valid)
+    for answer in valid:
+        record_access(answer_key(answer))
+    questions, answers = list(saved), list(saved.values())
+    for hook in bulk_save_hooks:
+        hook(questions, answers)
+    return questions
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Stress test: concurrent writers must never lose facts
+Spawns several processes that all call save_memory() at the same time on a
+scratch copy of the knowledge base, once per storage backend, and checks
+that every fact written is in the knowledge base afterwards.
+
+    python stress_memory.py [writers] [facts_per_writer]
+"""
+
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKENDS = ["json", "sqlite", "journal"]
+
+
+def writer(directory, worker, facts, start):
+    """One writer process: save `facts` distinct questions as fast as possible"""
+    os.chdir(directory)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from shared_memory import save_memory
+    start.wait()
+    for i in range(facts):
+        save_memory(f"Stress question {worker}-{i}?", f"Stress answer {worker}-{i}.")
+
+
+def prepare(directory, backend):
+    """Fresh knowledge base in `directory` using the given backend"""
+    os.chdir(directory)
+    with open("shared_memory.json", "w") as f:
+        json.dump({"topics": {}}, f)
+    if backend == "sqlite":
+        from memory_db import migrate
+    elif backend == "journal":
+        from memory_journal import migrate
+    else:
+        return
+    migrate()
+
+
+def run_backend(backend, writers, facts):
+    directory = tempfile.mkdtemp(prefix=f"stress_{backend}_")
+    here = os.getcwd()
+    try:
+        context = multiprocessing.get_context("spawn")
+        prepare(directory, backend)
+        start = context.Event()
+        procs = [context.Process(target=writer, args=(directory, w, facts, start)) for w in range(writers)]
+        for p in procs:
+            p.start()
+        started = time.perf_counter()
+        start.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+        # Read back in a fresh process so no in-memory state is reused
+        check = (
+            "import json, shared_memory; "
+            "print(json.dumps(sorted(shared_memory.load_memory()['topics'])))"
+        )
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, "-c", check], cwd=directory, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        stored = set(json.loads(output.strip().splitlines()[-1]))
+        expected = {f"Stress question {w}-{i}?" for w in range(writers) for i in range(facts)}
+        lost = len(expected - stored)
+        failed = sum(1 for p in procs if p.exitcode != 0)
+        return lost, failed, elapsed
+    finally:
+        os.chdir(here)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def stress_memory(writers=8, facts=50):
+    print(f"🧪 Concurrent Write Stress Test ({writers} writers x {facts} facts)")
+    print("=" * 60)
+    print(f"{'backend':<10} | {'seconds':>8} | {'lost':>5} | {'crashed':>7}")
+    print("-" * 60)
+    ok = True
+    for backend in BACKENDS:
+        lost, failed, elapsed = run_backend(backend, writers, facts)
+        ok = ok and lost == 0 and failed == 0
+        print(f"{backend:<10} | {elapsed:>8.2f} | {lost:>5} | {failed:>7} {'✅' if lost == 0 and failed == 0 else '❌'}")
+    print("=" * 60)
+    print("✅ No facts lost." if ok else "❌ Facts were lost or writers crashed.")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(0 if stress_memory(*map(int, sys.argv[1:3])) else 1)
@@ -7,7 +7,7 @@ from agent_alpha import alpha_talk
 from search_module import search_web
 from question_generator import generate_questions_from_text
 from nn_brain import train_brain, predict_answer, get_brain_stats
-from shared_memory import save_memory, load_memory
+from shared_memory import save_memories, load_memory
 from logger import log_event
 
 def test_real_system():
@@ -55,8 +55,7 @@ def test_real_system():
         ("What is artificial intelligence?", "AI is the capability of machines to perform tasks that typically require human intelligence.")
     ]
     
-    for question, answer in knowledge_pairs:
-        save_memory(question, answer)
+    save_memories(knowledge_pairs)
     
     # Train the brain
     print("🧠 Training neural brain...")
@@ -0,0 +1,136 @@
+"""
+Retraining scheduler for the learning loop
+Decides when new knowledge is worth a training run instead of retraining
+after every fact. A run is triggered when any policy fires:
+
+- count:    at least `min_new_facts` facts are waiting
+- interval: facts are waiting and `max_interval` seconds passed since the last run
+- drift:    the brain missed at least `drift_threshold` of the recent questions
+            it was asked and a few facts are waiting
+- idle:     facts are waiting and none arrived for `idle_window` seconds
+
+The idle policy is a debounce timer, so a burst of save_memory calls is
+merged into a single run once the burst is over. Facts still pending when
+the interpreter exits are trained before it does, so short sessions that
+never reach a policy (run_now.py, demo.py, ...) still teach the brain.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from brain_trainer import request_training, finish_training
+
+# Unused here, but sklearn imports them lazily (through joblib) and they
+# cannot be imported once the interpreter is shutting down, which is when
+# finish_session() may run the first training of a session
+import concurrent.futures.process
+import concurrent.futures.thread
+
+
+class TrainingScheduler:
+    def __init__(self, min_new_facts=20, max_interval=300, idle_window=60,
+                 drift_threshold=0.8, drift_window=20, trigger=request_training):
+        self.min_new_facts = min_new_facts
+        self.max_interval = max_interval
+        self.idle_window = idle_window
+        self.drift_threshold = drift_threshold
+        self.trigger = trigger
+
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.last_run = time.monotonic()
+        self.recent_hits = deque(maxlen=drift_window)
+        self.idle_timer = None
+        self.runs = 0
+        self.facts_seen = 0
+        self.last_reason = None
+
+    def record_fact(self):
+        """Note one newly saved fact; returns the policy that triggered training, if any"""
+        with self.lock:
+            self.pending += 1
+            self.facts_seen += 1
+            self._arm_idle_timer()
+        return self.poll()
+
+    def record_predictions(self, results):
+        """Feed brain outcomes (dicts from predict_answers) into the drift signal"""
+        with self.lock:
+            for result in results:
+                self.recent_hits.append(bool(result["tier"]))
+
+    def miss_rate(self):
+        if not self.recent_hits:
+            return 0.0
+        return 1.0 - sum(self.recent_hits) / len(self.recent_hits)
+
+    def due(self):
+        """Name of the first policy that wants a run now, or None"""
+        if self.pending == 0:
+            return None
+        if self.pending >= self.min_new_facts:
+            return "count"
+        if time.monotonic() - self.last_run >= self.max_interval:
+            return "interval"
+        if (len(self.recent_hits) == self.recent_hits.maxlen
+                and self.miss_rate() >= self.drift_threshold
+                and self.pending >= max(1, self.min_new_facts // 4)):
+            return "drift"
+        return None
+
+    def poll(self):
+        """Trigger a run if a policy is due; returns its name or None"""
+        with self.lock:
+            reason = self.due()
+            if reason:
+                self._start_run(reason)
+        return reason
+
+    def flush(self):
+        """Train whatever is pending right away (end of a session)"""
+        with self.lock:
+            if self.pending:
+                self._start_run("flush")
+                return "flush"
+        return None
+
+    def _start_run(self, reason):
+        self.pending = 0
+        self.last_run = time.monotonic()
+        self.recent_hits.clear()
+        self.runs += 1
+        self.last_reason = reason
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        self.trigger()
+
+    def _arm_idle_timer(self):
+        """Restart the debounce timer that fires once facts stop arriving"""
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+        self.idle_timer = threading.Timer(self.idle_window, self._on_idle)
+        self.idle_timer.daemon = True
+        self.idle_timer.start()
+
+    def _on_idle(self):
+        with self.lock:
+            self.idle_timer = None
+            if self.pending:
+                self._start_run("idle")
+
+
+# Shared scheduler used by the agents
+scheduler = TrainingScheduler()
+
+
+def finish_session():
+    """Train whatever is pending and wait for the background trainer"""
+    if scheduler.pending:
+        print(f"⏳ Training {scheduler.pending} new fact(s) before exit...")
+    scheduler.flush()
+    finish_training()
+
+
+atexit.register(finish_session)
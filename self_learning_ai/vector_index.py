@@ -0,0 +1,297 @@
+"""
+Approximate nearest-neighbour index for the brain's similarity fallback
+IVF-flat written in NumPy: normalised question vectors live in a memory-mapped
+.npy matrix, grouped into inverted lists around spherical k-means centroids.
+A query only scans the `nprobe` lists closest to it, so lookups stay in the
+low milliseconds at a million topics. Small indexes are scanned exactly.
+
+Several processes may share one index. The topics file is the row log: its
+first line names a generation (a new one after clear()), and line i + 1 is
+the topic of row i. Rows are appended under a file lock after catching up
+with the rows other processes added; each process assigns rows it did not
+add to its own copy of the inverted lists.
+"""
+
+import json
+import os
+import numpy as np
+from file_lock import FileLock
+from mmap_matrix import MappedMatrix, file_id, new_generation, start_log, read_log
+
+INDEX_VERSION = 2
+
+
+def normalise(vecs):
+    """Unit-length float32 rows (a single vector comes back as one row)"""
+    vecs = np.atleast_2d(np.asarray(vecs, dtype=np.float32))
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vecs / norms
+
+
+class VectorIndex:
+    def __init__(self, path="brain_index.npy", nprobe=8, min_train_size=4096):
+        base = os.path.splitext(path)[0]
+        self.path = path
+        self.topics_path = base + "_topics.jsonl"
+        self.ivf_path = base + "_ivf.npz"
+        self.lock = FileLock(path + ".lock")
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.dirty = False
+        self.warned = False
+        self.reset()
+        self.refresh()
+
+    def reset(self):
+        """Forget everything held in memory"""
+        self.generation = None
+        self.topics_end = 0
+        self.matrix = MappedMatrix(self.path)
+        self.ivf_id = None
+        self.count = 0
+        self.topics = []
+        self.rows = {}
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.lists = []
+        self.trained_at = 0
+
+    def refresh(self):
+        """Catch up with rows and IVF layouts other processes wrote"""
+        if not os.path.exists(self.topics_path):
+            return
+        with self.lock:
+            self._load()
+
+    def _load(self):
+        """Catch up with the index on disk (lock held), falling back to an empty one if anything is off"""
+        try:
+            if not os.path.exists(self.topics_path):
+                if self.generation is not None:
+                    self.reset()
+                return
+            with open(self.topics_path, "rb") as f:
+                header = f.readline()
+                try:
+                    generation = json.loads(header)["generation"]
+                except (ValueError, TypeError, KeyError):
+                    if not self.warned:
+                        print("⚠️ Vector index format changed, it will be rebuilt.")
+                        self.warned = True
+                    self.reset()
+                    return
+                if generation != self.generation:
+                    self.reset()
+                    self.generation = generation
+                    self.topics_end = len(header)
+                lines, self.topics_end = read_log(f, self.topics_end)
+                for line in lines:
+                    topic = json.loads(line)
+                    self.rows[topic] = len(self.topics)
+                    self.topics.append(topic)
+            self.count = len(self.topics)
+
+            # Grown or written by another process: map the current file
+            self.matrix.refresh()
+
+            ivf_id = file_id(self.ivf_path)
+            if ivf_id != self.ivf_id:
+                self.ivf_id = ivf_id
+                self._load_ivf()
+            if len(self.assign) < self.count:
+                self.assign = np.concatenate([self.assign, np.full(self.count - len(self.assign), -1, dtype=np.int32)])
+            if self.centroids is not None:
+                # Rows other processes added since the saved layout
+                missing = np.flatnonzero(self.assign[:self.count] < 0)
+                if len(missing):
+                    self._assign_rows(missing, normalise(self.matrix.data[missing]))
+        except Exception as e:
+            print(f"⚠️ Failed to load vector index: {e}")
+            self.reset()
+
+    def _load_ivf(self):
+        """Centroids and row assignments saved for the current generation"""
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.lists = []
+        self.trained_at = 0
+        if self.ivf_id is None:
+            return
+        ivf = np.load(self.ivf_path)
+        if int(ivf["version"]) != INDEX_VERSION or str(ivf["generation"]) != self.generation:
+            return
+        count = min(int(ivf["count"]), self.count)
+        self.assign = np.array(ivf["assign"][:count], dtype=np.int32)
+        self.trained_at = int(ivf["trained_at"])
+        if ivf["centroids"].size:
+            self.centroids = np.array(ivf["centroids"], dtype=np.float32)
+            self._rebuild_lists()
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, topic):
+        return topic in self.rows
+
+    def _new_generation(self):
+        """Start an empty topics file under a fresh generation (lock held)"""
+        generation = new_generation()
+        end = start_log(self.topics_path, (json.dumps({"generation": generation}) + "\n").encode("utf-8"))
+        matrix = self.matrix
+        self.reset()
+        # The vector file is reused: rows are overwritten as they are re-added
+        self.matrix = matrix
+        self.generation = generation
+        self.topics_end = end
+
+    def clear(self):
+        """Forget every vector, in every process sharing the index"""
+        with self.lock:
+            self._new_generation()
+            self.dirty = True
+
+    def add(self, topic, vec):
+        """Insert or update one question vector"""
+        self.add_many([topic], vec)
+
+    def add_many(self, topics, vecs):
+        """Insert or update a batch of question vectors"""
+        if len(topics) == 0:
+            return
+        vecs = normalise(vecs)
+        with self.lock:
+            self._load()
+            if self.generation is None:
+                self._new_generation()
+            used = self.count
+            rows = []
+            new = []
+            for topic in topics:
+                row = self.rows.get(topic)
+                if row is None:
+                    row = self.count
+                    self.rows[topic] = row
+                    self.topics.append(topic)
+                    self.count += 1
+                    new.append(json.dumps(topic) + "\n")
+                rows.append(row)
+
+            self.matrix.ensure_capacity(self.count, vecs.shape[1], used)
+            end = self.matrix.write(rows, vecs, self.topics_path, new)
+            if end is not None:
+                self.topics_end = end
+            if len(self.assign) < self.count:
+                self.assign = np.concatenate([self.assign, np.full(self.count - len(self.assign), -1, dtype=np.int32)])
+
+            if self.centroids is not None:
+                if self.count >= 2 * self.trained_at:
+                    self.train()
+                else:
+                    self._assign_rows(np.array(rows), vecs)
+            elif self.count >= self.min_train_size:
+                self.train()
+            self.dirty = True
+
+    def _assign_rows(self, rows, vecs):
+        """Move rows into the inverted list of their nearest centroid"""
+        lists = np.argmax(vecs @ self.centroids.T, axis=1)
+        for row, new in zip(rows.tolist(), lists.tolist()):
+            old = self.assign[row]
+            if old == new:
+                continue
+            if old >= 0:
+                self.lists[old].remove(row)
+            self.lists[new].append(row)
+            self.assign[row] = new
+
+    def _rebuild_lists(self):
+        """Group row ids by centroid from the stored assignments"""
+        self.lists = [[] for _ in range(len(self.centroids))]
+        for row, cell in enumerate(self.assign.tolist()):
+            if cell >= 0:
+                self.lists[cell].append(row)
+
+    def train(self, iterations=10, sample_size=65536):
+        """Fit spherical k-means centroids and reassign every row"""
+        if self.count < self.min_train_size:
+            return
+        n_lists = int(np.sqrt(self.count))
+        rng = np.random.RandomState(0)
+        sample_rows = np.sort(rng.choice(self.count, min(self.count, sample_size), replace=False))
+        sample = np.asarray(self.matrix.data[sample_rows])
+
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            filled = np.bincount(labels, minlength=n_lists) > 0
+            centroids[filled] = normalise(sums[filled])
+
+        self.centroids = centroids
+        self.assign = np.empty(self.count, dtype=np.int32)
+        for start in range(0, self.count, 65536):
+            chunk = np.asarray(self.matrix.data[start:start + 65536][:self.count - start])
+            self.assign[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+        self._rebuild_lists()
+        self.trained_at = self.count
+        self.dirty = True
+
+    def search(self, vec, k=5):
+        """Return up to k (topic, cosine similarity) pairs, best first"""
+        return self.search_many(vec, k)[0]
+
+    def search_many(self, vecs, k=5):
+        """Top-k search for a batch of query vectors, one result list per row"""
+        queries = normalise(vecs)
+        self.refresh()
+        if self.count == 0:
+            return [[] for _ in queries]
+
+        if self.centroids is None:
+            scores = queries @ np.asarray(self.matrix.data[:self.count]).T
+            return [self._top_k(row_scores, None, k) for row_scores in scores]
+
+        results = []
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, :self.nprobe]
+        for query, probe in zip(queries, probes):
+            rows = np.fromiter((row for cell in probe for row in self.lists[cell]), dtype=np.int64)
+            if len(rows) == 0:
+                results.append([])
+                continue
+            results.append(self._top_k(np.asarray(self.matrix.data[rows]) @ query, rows, k))
+        return results
+
+    def _top_k(self, scores, rows, k):
+        """Best k (topic, score) pairs from scores over the given rows (or all rows)"""
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        if rows is not None:
+            return [(self.topics[rows[i]], float(scores[i])) for i in best]
+        return [(self.topics[i], float(scores[i])) for i in best]
+
+    def flush(self):
+        """Persist vectors and the IVF layout if anything changed (topics are logged as they are added)"""
+        if not self.dirty:
+            return
+        with self.lock:
+            self._load()
+            self.matrix.flush()
+            if self.generation is None:
+                self._new_generation()
+            tmp_path = f"{self.ivf_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    version=INDEX_VERSION,
+                    generation=self.generation,
+                    count=self.count,
+                    trained_at=self.trained_at,
+                    assign=self.assign[:self.count],
+                    centroids=self.centroids if self.centroids is not None else np.zeros((0, 0), dtype=np.float32)
+                )
+            os.replace(tmp_path, self.ivf_path)
+            self.ivf_id = file_id(self.ivf_path)
+            self.dirty = False